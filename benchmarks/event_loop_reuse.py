@@ -0,0 +1,107 @@
+"""Per-request latency with a loop per call versus the persistent background loop.
+
+The old run_async created and closed an event loop for every call, so async
+HTTP clients could not keep connections open between calls. This compares:
+
+  per-call    new event loop and new httpx.AsyncClient for every request
+  persistent  one AsyncClient on the shared BackgroundEventLoop, reused
+
+By default requests go to a local keep-alive HTTP server. Pass --url to measure
+against a real endpoint instead, e.g. an Ollama server or a remote API where
+TCP and TLS setup dominate:
+
+    python -m benchmarks.event_loop_reuse --requests 50
+    python -m benchmarks.event_loop_reuse --url http://localhost:11434/api/tags
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from src.core.async_runtime import get_background_loop
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send each response in one segment so Nagle/delayed ACK don't add latency
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_GET(self):
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def per_call_request(url):
+    """What run_async used to do: fresh loop, fresh client, close both"""
+    async def request():
+        async with httpx.AsyncClient() as client:
+            (await client.get(url)).raise_for_status()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start = time.perf_counter()
+    loop.run_until_complete(request())
+    elapsed = time.perf_counter() - start
+    loop.close()
+    return elapsed
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:>10}: mean {statistics.mean(samples) * 1000:7.2f} ms  "
+          f"p50 {statistics.median(samples) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+    return statistics.mean(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="endpoint to request (defaults to a local keep-alive server)")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_local_server()
+
+    per_call = [per_call_request(url) for _ in range(args.requests)]
+
+    background = get_background_loop()
+    client = background.run(_make_client())
+
+    async def timed_request():
+        start = time.perf_counter()
+        (await client.get(url)).raise_for_status()
+        return time.perf_counter() - start
+
+    persistent = [background.run(timed_request()) for _ in range(args.requests)]
+    background.run(client.aclose())
+
+    print(f"{args.requests} sequential requests to {url}")
+    before = summarize("per-call", per_call)
+    after = summarize("persistent", persistent)
+    print(f"saving: {(before - after) * 1000:.2f} ms per request ({(1 - after / before):.0%})")
+
+    if server:
+        server.shutdown()
+
+async def _make_client():
+    # The client must be created on the loop that will use it
+    return httpx.AsyncClient()
+
+if __name__ == "__main__":
+    main()
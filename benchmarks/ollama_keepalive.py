@@ -0,0 +1,115 @@
+"""Check the Ollama keep-alive against a local stub server.
+
+Starts an http.server stub that answers /api/generate like Ollama (reporting a
+slow first load and fast warm calls), points config.OLLAMA["base_url"] at it
+and runs the keep-alive with a short ping interval under fixed clocks:
+
+  business hours   Wednesday 10:00, pings every interval after the warm-up
+  evening          Wednesday 20:00, only the start-up warm-up is sent
+  weekend          Saturday 10:00, only the start-up warm-up is sent
+
+Each request is checked for the model, keep_alive and a one-token limit, and
+the reported load and inference durations are printed. Exits 1 on failure.
+
+    python -m benchmarks.ollama_keepalive --interval 0.05 --duration 0.5
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import config
+from src.models.ollama_keepalive import OllamaKeepAlive
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate; the first request pays a simulated model load"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append((self.path, body))
+            first = len(self.server.requests) == 1
+        payload = json.dumps({
+            "model": body.get("model"),
+            "response": "pong",
+            "done": True,
+            # Durations in nanoseconds, as Ollama reports them
+            "load_duration": 2_000_000_000 if first else 5_000_000,
+            "prompt_eval_duration": 20_000_000,
+            "eval_duration": 10_000_000,
+            "total_duration": 2_030_000_000 if first else 35_000_000,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.requests = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_scenario(server, now, interval, duration):
+    """Run the keep-alive for duration seconds with a fixed clock; return its requests"""
+    with server.lock:
+        server.requests.clear()
+    keepalive = OllamaKeepAlive.from_config(ping_interval=interval, clock=lambda: now, timeout=5)
+    keepalive.start()
+    time.sleep(duration)
+    keepalive.stop()
+    with server.lock:
+        return list(server.requests), keepalive
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, default=0.05, help="ping interval in seconds")
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds to run each scenario")
+    args = parser.parse_args()
+
+    server = start_stub()
+    config.OLLAMA["base_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    config.OLLAMA["business_hours"] = "08:00-18:00"
+    config.OLLAMA["business_days"] = "0-4"
+    print(f"Stub Ollama at {config.OLLAMA['base_url']}, pinging every {args.interval}s for {args.duration}s\n")
+
+    # Pings the interval allows in the run, leaving room for a slow scheduler
+    expected_pings = max(1, int(args.duration / args.interval) // 2)
+    scenarios = [
+        ("business hours", datetime(2024, 5, 15, 10, 0), True),
+        ("evening", datetime(2024, 5, 15, 20, 0), False),
+        ("weekend", datetime(2024, 5, 18, 10, 0), False),
+    ]
+
+    failures = []
+    for name, now, pings in scenarios:
+        requests, keepalive = run_scenario(server, now, args.interval, args.duration)
+        sent = len(requests)
+        ok = sent >= 1 + expected_pings if pings else sent == 1
+        for path, body in requests:
+            ok = ok and path == "/api/generate" and body.get("model") == config.OLLAMA["default_model"]
+            ok = ok and body.get("keep_alive") == config.OLLAMA["keep_alive"]
+            ok = ok and body.get("options", {}).get("num_predict") == 1
+        stats = keepalive.stats()
+        ok = ok and stats["failures"] == 0
+        print(f"{name:<15} {now:%a %H:%M}  {sent:3d} requests  "
+              f"first load {stats.get('first_load', 0):.3f}s  last load {stats.get('last_load', 0):.3f}s  "
+              f"last inference {stats.get('last_inference', 0):.3f}s  {'ok' if ok else 'FAILED'}")
+        if not ok:
+            failures.append(name)
+
+    server.shutdown()
+    if failures:
+        print(f"\nKeep-alive checks failed: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
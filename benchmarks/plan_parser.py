@@ -0,0 +1,128 @@
+"""Speed and fidelity of the markdown plan parser.
+
+Compares src.core.plan_markdown.parse_plan_markdown with the regex parser it
+replaced (kept below as legacy_parse) on:
+
+  data/plans   every markdown plan in the plans directory
+  synthetic    generated plans with --tasks tasks in total, spread over work
+               packages of --tasks-per-wp tasks
+
+Fidelity checks:
+  legacy-equal  the new parser returns what the legacy one did (for plans the
+                legacy parser can represent: no checked tasks, no IDs past Z)
+  round-trip    parse(render(plan)) == plan for synthetic plans, including
+                checked tasks, task IDs past Z and nested bullets, and
+                render(parse(md)) == md for plans written by the renderer
+
+Run from the project root:
+
+    python -m benchmarks.plan_parser --tasks 10000 --repeat 5
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+
+from src.config import config
+from src.core.plan_markdown import parse_plan_markdown, render_plan_markdown
+
+def legacy_parse(markdown_content):
+    """The previous parse_markdown_plan, unchanged"""
+    overview_match = re.search(r'# Development Plan\s+(.*?)\s+# Work Packages',
+                              markdown_content, re.DOTALL)
+    overview = overview_match.group(1).strip() if overview_match else ""
+    work_packages = []
+    wp_sections = re.findall(r'## WP\d+: (.*?)(?=## WP\d+:|$)', markdown_content + "\n## WP999:", re.DOTALL)
+    for wp_section in wp_sections:
+        lines = wp_section.strip().split('\n')
+        if not lines:
+            continue
+        title = lines[0].strip()
+        tasks = []
+        for line in lines[1:]:
+            task_match = re.search(r'- \[ \] WP\d+-[A-Z]: (.*)', line)
+            if task_match:
+                tasks.append(task_match.group(1))
+        work_packages.append({"title": title, "tasks": tasks})
+    return {"overview": overview, "work_packages": work_packages, "plan": markdown_content, "path": ""}
+
+def synthetic_plan(total_tasks, tasks_per_wp, extended=False):
+    """A plan with total_tasks tasks. extended adds checked tasks and nested bullets"""
+    work_packages = []
+    for i in range(0, total_tasks, tasks_per_wp):
+        count = min(tasks_per_wp, total_tasks - i)
+        tasks = [f"Implement component {i + j} with tests and documentation" for j in range(count)]
+        wp = {"title": f"Work package {len(work_packages) + 1}", "tasks": tasks}
+        if extended:
+            wp["done"] = [j % 3 == 0 for j in range(count)]
+            tasks[0] += "\n  - check the edge cases\n  - update the changelog"
+        work_packages.append(wp)
+    return {"overview": "Synthetic plan for benchmarking.\n\nSecond paragraph.", "work_packages": work_packages}
+
+def structure(plan_data):
+    return {"overview": plan_data["overview"], "work_packages": plan_data["work_packages"]}
+
+def time_parser(parse, markdown_content, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(markdown_content)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def report(name, legacy_seconds, new_seconds):
+    print(f"{name:<38} {legacy_seconds * 1000:10.2f} {new_seconds * 1000:10.2f} {legacy_seconds / new_seconds:8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans-dir", default=str(config.PATHS["plans"]))
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--tasks-per-wp", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'input':<38} {'legacy ms':>10} {'new ms':>10} {'speedup':>9}")
+
+    plan_files = sorted(Path(args.plans_dir).glob("*.md"))
+    contents = [path.read_text() for path in plan_files]
+    if contents:
+        legacy_total = sum(time_parser(legacy_parse, content, args.repeat) for content in contents)
+        new_total = sum(time_parser(parse_plan_markdown, content, args.repeat) for content in contents)
+        report(f"data/plans ({len(contents)} files)", legacy_total, new_total)
+        for path, content in zip(plan_files, contents):
+            if parse_plan_markdown(content) != legacy_parse(content):
+                failures.append(f"legacy-equal: {path.name}")
+            if content == render_plan_markdown(legacy_parse(content)) and \
+                    render_plan_markdown(parse_plan_markdown(content)) != content:
+                failures.append(f"round-trip: {path.name}")
+
+    for tasks_per_wp in (args.tasks_per_wp, 26):
+        plan_data = synthetic_plan(args.tasks, tasks_per_wp)
+        markdown_content = render_plan_markdown(plan_data)
+        report(f"synthetic {args.tasks} tasks, {tasks_per_wp}/WP",
+               time_parser(legacy_parse, markdown_content, args.repeat),
+               time_parser(parse_plan_markdown, markdown_content, args.repeat))
+        if structure(parse_plan_markdown(markdown_content)) != plan_data:
+            failures.append(f"round-trip: synthetic {tasks_per_wp}/WP")
+        if parse_plan_markdown(markdown_content) != legacy_parse(markdown_content):
+            failures.append(f"legacy-equal: synthetic {tasks_per_wp}/WP")
+
+    # Only the new parser can represent these, so there is nothing to compare against
+    for tasks_per_wp in (args.tasks_per_wp, 100):
+        plan_data = synthetic_plan(args.tasks, tasks_per_wp, extended=True)
+        markdown_content = render_plan_markdown(plan_data)
+        parsed = parse_plan_markdown(markdown_content)
+        if structure(parsed) != plan_data or render_plan_markdown(parsed) != markdown_content:
+            failures.append(f"round-trip: synthetic {tasks_per_wp}/WP with checked and nested tasks")
+
+    if failures:
+        print("\nFidelity failures:")
+        for failure in failures:
+            print(f"  {failure}")
+        raise SystemExit(1)
+    print("\nAll fidelity checks passed")
+
+if __name__ == "__main__":
+    main()
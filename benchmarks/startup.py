@@ -0,0 +1,188 @@
+"""Cold-start profile for the Streamlit app, checked against a stored baseline.
+
+Every measurement runs in a fresh interpreter so nothing is already imported:
+
+  import:<module>     cumulative import time from `python -X importtime`
+  first_page_render   importing streamlit and running app.py once through
+                      streamlit.testing's AppTest, i.e. the first script run
+                      behind a page load
+  first_search        loading the vector store and embedding model and running
+                      one search_context call with an uncached query
+
+Each figure is the median of --repeat runs. Results are compared with
+benchmarks/startup_baseline.json; any metric slower than its baseline by more
+than --tolerance (relative) and --slack (absolute seconds) is reported as a
+regression and the script exits non-zero.
+
+    python -m benchmarks.startup                    # report and check
+    python -m benchmarks.startup --update-baseline  # record current numbers
+    python -m benchmarks.startup --top 25           # also list heaviest imports
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "startup_baseline.json"
+
+# What the app imports at startup, followed by what it pulls in on demand
+IMPORT_TARGETS = [
+    "streamlit",
+    "src.config",
+    "src.core.async_runtime",
+    "src.ui.components.development_plan",
+    "src.models.router",
+    "src.core.planner",
+    "src.storage.vector_store",
+    "pandas",
+    "langchain_chroma",
+    "langchain_huggingface",
+    "sentence_transformers",
+    "torch",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+FIRST_PAGE_RENDER = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("src/ui/app.py", default_timeout=300)
+app.run()
+elapsed = time.perf_counter() - start
+if app.exception:
+    raise SystemExit(f"app.py raised: {app.exception}")
+print(elapsed)
+"""
+
+FIRST_SEARCH = """
+import asyncio, time, uuid
+start = time.perf_counter()
+from src.storage.vector_store import ContextVectorStore
+store = ContextVectorStore()
+asyncio.run(store.search_context(f"cold start probe {uuid.uuid4().hex}", k=1))
+print(time.perf_counter() - start)
+"""
+
+def _env():
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(PROJECT_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def _run(args):
+    result = subprocess.run(
+        [sys.executable, *args], cwd=PROJECT_ROOT, env=_env(),
+        capture_output=True, text=True
+    )
+    return result
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def measure_import(module):
+    """Cold cumulative import time of one module in seconds, plus the raw rows"""
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        return None, []
+    rows = parse_importtime(result.stderr)
+    cumulative = next((c for name, _, c, _ in reversed(rows) if name == module), None)
+    return (cumulative / 1e6 if cumulative is not None else None), rows
+
+def measure_script(code):
+    result = _run(["-c", code])
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed", file=sys.stderr)
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def median_of(repeat, measure):
+    samples = [value for value in (measure() for _ in range(repeat)) if value is not None]
+    return statistics.median(samples) if samples else None
+
+def collect(repeat, top):
+    metrics = {}
+    heaviest = {}
+    for module in IMPORT_TARGETS:
+        samples = []
+        for _ in range(repeat):
+            seconds, rows = measure_import(module)
+            if seconds is not None:
+                samples.append(seconds)
+            for name, self_us, _, _ in rows:
+                heaviest[name] = max(heaviest.get(name, 0), self_us)
+        metrics[f"import:{module}"] = statistics.median(samples) if samples else None
+
+    metrics["first_page_render"] = median_of(repeat, lambda: measure_script(FIRST_PAGE_RENDER))
+    metrics["first_search"] = median_of(repeat, lambda: measure_script(FIRST_SEARCH))
+
+    if top:
+        print(f"Heaviest individual imports (self time):")
+        for name, self_us in sorted(heaviest.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {self_us / 1000:9.1f} ms  {name}")
+        print()
+    return metrics
+
+def compare(metrics, baseline, tolerance, slack):
+    """Print the report and return the names of regressed metrics, including
+    metrics with a baseline that could not be measured this time
+    """
+    regressions = []
+    print(f"{'metric':<45} {'current':>10} {'baseline':>10} {'change':>8}")
+    for name, current in metrics.items():
+        before = baseline.get(name)
+        current_text = f"{current:.3f}s" if current is not None else "n/a"
+        before_text = f"{before:.3f}s" if before is not None else "-"
+        change = ""
+        if current is None and before is not None:
+            # An import error or crashing script must not pass as "no regression"
+            regressions.append(name)
+            change = "failed !"
+        elif current is not None and before:
+            change = f"{(current / before - 1):+.0%}"
+            if current > before * (1 + tolerance) + slack:
+                regressions.append(name)
+                change += " !"
+        print(f"{name:<45} {current_text:>10} {before_text:>10} {change:>8}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack", type=float, default=0.05, help="allowed absolute slowdown in seconds")
+    parser.add_argument("--top", type=int, default=0, help="list the N heaviest individual imports")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    metrics = collect(args.repeat, args.top)
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps(
+            {name: value for name, value in metrics.items() if value is not None}, indent=2, sort_keys=True
+        ) + "\n")
+        compare(metrics, {}, args.tolerance, args.slack)
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if not baseline:
+        print(f"No baseline at {BASELINE_PATH}; run with --update-baseline to record one\n")
+    regressions = compare(metrics, baseline, args.tolerance, args.slack)
+    if regressions:
+        print(f"\nStartup regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Throughput of ContextVectorStore under N concurrent async callers.
+
+Each caller runs a mix of searches and ingests (one ingest per four operations)
+with unique texts, so the embedding cache never short-circuits the model.
+Two modes are compared:
+
+  blocking  calls Chroma's similarity_search/add_texts directly inside the
+            coroutine, which is how the store behaved before its async
+            methods were backed by an executor
+  executor  awaits ContextVectorStore.search_context/add_context
+
+Run from the project root:
+
+    python -m benchmarks.vector_store_concurrency --callers 1 2 4 8 --ops 20
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+
+from src.config import config
+from src.storage.vector_store import ContextVectorStore, iter_plan_files
+
+async def blocking_caller(store, caller, ops, tag):
+    for i in range(ops):
+        text = f"{tag} caller {caller} operation {i}: background job scheduling and retries"
+        if i % 4 == 0:
+            store.vector_store.add_texts([text], metadatas=[{"type": "benchmark"}])
+        else:
+            store.vector_store.similarity_search(text, k=5)
+
+async def executor_caller(store, caller, ops, tag):
+    for i in range(ops):
+        text = f"{tag} caller {caller} operation {i}: background job scheduling and retries"
+        if i % 4 == 0:
+            await store.add_context(text, {"type": "benchmark"})
+        else:
+            await store.search_context(text, k=5)
+
+async def measure(caller_fn, store, callers, ops):
+    """Return operations per second for callers running concurrently"""
+    tag = uuid.uuid4().hex
+    start = time.perf_counter()
+    await asyncio.gather(*(caller_fn(store, caller, ops, tag) for caller in range(callers)))
+    return callers * ops / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=20, help="operations per caller")
+    parser.add_argument("--workers", type=int, default=config.INGEST["max_workers"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        store = ContextVectorStore(persist_dir=persist_dir, max_workers=args.workers)
+
+        # Seed with the existing plans so searches run against a realistic collection,
+        # and warm the model so loading time isn't attributed to the first mode
+        asyncio.run(store.add_contexts_bulk(iter_plan_files(config.PATHS["plans"])))
+        asyncio.run(measure(executor_caller, store, 1, 4))
+
+        print(f"{'callers':>8} {'blocking op/s':>14} {'executor op/s':>14} {'speedup':>8}")
+        for callers in args.callers:
+            blocking = asyncio.run(measure(blocking_caller, store, callers, args.ops))
+            executor = asyncio.run(measure(executor_caller, store, callers, args.ops))
+            print(f"{callers:>8} {blocking:>14.1f} {executor:>14.1f} {executor / blocking:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,45 @@ class Config:
         "reviewer": os.getenv("REVIEWER_MODEL", "gpt-4o"),
     }
     
+    # Request routing: optionally race each request against a second model and
+    # return whichever valid answer arrives first
+    ROUTING = {
+        "hedge": os.getenv("HEDGE_REQUESTS", "false").lower() == "true",
+        "hedge_model": os.getenv("HEDGE_MODEL", "default"),
+        "hedge_delay": float(os.getenv("HEDGE_DELAY", "0")),
+        # Create every configured model client in the background at startup
+        "warm_up": os.getenv("MODEL_WARM_UP", "false").lower() == "true",
+    }
+    
+    # Per-provider protection: requests per second (0 = unlimited), concurrency cap,
+    # retries with jittered backoff limited to a fraction of requests, and a circuit
+    # breaker that routes straight to the fallback model while a provider is failing
+    RESILIENCE = {
+        "rate_limits": {
+            "openai": float(os.getenv("OPENAI_RATE_LIMIT", "5")),
+            "anthropic": float(os.getenv("ANTHROPIC_RATE_LIMIT", "2")),
+            "ollama": float(os.getenv("OLLAMA_RATE_LIMIT", "0")),
+        },
+        "max_concurrency": int(os.getenv("PROVIDER_MAX_CONCURRENCY", "4")),
+        "max_retries": int(os.getenv("PROVIDER_MAX_RETRIES", "2")),
+        "retry_base_delay": float(os.getenv("PROVIDER_RETRY_BASE_DELAY", "0.5")),
+        "retry_budget": float(os.getenv("PROVIDER_RETRY_BUDGET", "0.2")),
+        "failure_threshold": int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+        "reset_timeout": float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+    }
+    
+    # Local Ollama server: keep the default model loaded, warm it at startup and
+    # ping it during business hours so requests after idle don't pay the load
+    OLLAMA = {
+        "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        "default_model": os.getenv("OLLAMA_DEFAULT_MODEL", "gemma3:12b"),
+        "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        "warm_up": os.getenv("OLLAMA_WARM_UP", "true").lower() == "true",
+        "ping_interval": float(os.getenv("OLLAMA_PING_INTERVAL", "600")),
+        "business_hours": os.getenv("OLLAMA_BUSINESS_HOURS", "08:00-18:00"),
+        "business_days": os.getenv("OLLAMA_BUSINESS_DAYS", "0-4"),
+    }
+    
     # Storage paths
     BASE_DIR = pathlib.Path.cwd()
     PATHS = {
@@ -19,6 +58,7 @@ class Config:
         "context": BASE_DIR / "data" / "context",
         "vector_store": BASE_DIR / "data" / "vectors",
         "data": BASE_DIR / "data",
+        "file_index": BASE_DIR / "data" / "file_index",
     }
     
     # Git configuration
@@ -27,6 +67,41 @@ class Config:
         "commit_message": os.getenv("GIT_COMMIT_MESSAGE", "Update from context manager"),
     }
     
+    # Cache configuration
+    CACHE = {
+        "embedding_max_entries": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),
+        "embedding_memory_entries": int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "4096")),
+        "llm_enabled": os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+        "llm_ttl": float(os.getenv("LLM_CACHE_TTL", "86400")),
+        "llm_max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+        "llm_memory_entries": int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+    }
+    
+    # Vector store ingestion
+    INGEST = {
+        "embed_batch_size": int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64")),
+        "write_batch_size": int(os.getenv("INGEST_WRITE_BATCH_SIZE", "1000")),
+        "max_workers": int(os.getenv("VECTOR_STORE_WORKERS", "4")),
+        # Workspace code ingestion: larger files are skipped, chunks are split beyond this many lines
+        "code_max_file_bytes": int(os.getenv("INGEST_CODE_MAX_FILE_BYTES", str(512 * 1024))),
+        "code_max_chunk_lines": int(os.getenv("INGEST_CODE_MAX_CHUNK_LINES", "120")),
+    }
+    
+    # Workspaces: the persistent file index is refreshed incrementally, at most
+    # once per refresh_interval seconds per workspace, unless a background watcher
+    # (inotify on Linux, otherwise polling every poll_interval seconds) keeps it current
+    WORKSPACE = {
+        "refresh_interval": float(os.getenv("WORKSPACE_REFRESH_INTERVAL", "5")),
+        "watch": os.getenv("WORKSPACE_WATCH", "true").lower() == "true",
+        "watch_debounce": float(os.getenv("WORKSPACE_WATCH_DEBOUNCE", "0.5")),
+        "poll_interval": float(os.getenv("WORKSPACE_POLL_INTERVAL", "10")),
+        # How long opening a workspace waits for its watcher's first refresh before refreshing itself
+        "watch_ready_timeout": float(os.getenv("WORKSPACE_WATCH_READY_TIMEOUT", "30")),
+        # Git status for the workspace list is computed in the background
+        "status_workers": int(os.getenv("WORKSPACE_STATUS_WORKERS", "4")),
+        "status_ttl": float(os.getenv("WORKSPACE_STATUS_TTL", "30")),
+    }
+    
     # LLM provider configuration
     API_KEYS = {
         "openai": None, 
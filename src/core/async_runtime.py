@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+class BackgroundEventLoop:
+    """A long-lived asyncio event loop running on a daemon thread.
+    Async clients created on this loop (and their pooled HTTP connections)
+    stay usable across calls, unlike a loop created and closed per call.
+    """
+
+    def __init__(self, name: str = "contextmgr-event-loop"):
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Cannot block on the background event loop from its own thread")
+        return self.submit(coro).result(timeout)
+
+    def iterate(self, stream: AsyncIterator) -> Iterator:
+        """Consume an async iterator on the loop, yielding its items to the calling thread"""
+        iterator = stream.__aiter__()
+
+        async def next_item():
+            return await iterator.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.run(next_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Close an abandoned async generator on the loop it runs on
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                self.run(aclose())
+
+    def stop(self):
+        """Stop the loop and wait for its thread to exit"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+_background_loop: Optional[BackgroundEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+def get_background_loop() -> BackgroundEventLoop:
+    """Get the process-wide background event loop, starting it on first use"""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                _background_loop = BackgroundEventLoop()
+    return _background_loop
@@ -0,0 +1,104 @@
+import re
+from typing import Any, Dict, List, Optional
+
+def wp_label(wp_index: int) -> str:
+    """WP001, WP002, ... for a zero-based work package index"""
+    return f"WP{wp_index+1:03d}"
+
+def task_letters(task_index: int) -> str:
+    """A..Z, then AA, AB, ... for a zero-based task index"""
+    letters = ""
+    task_index += 1
+    while task_index:
+        task_index, remainder = divmod(task_index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def task_label(wp_index: int, task_index: int) -> str:
+    """WP001-A, WP001-B, ... for zero-based work package and task indexes"""
+    return f"{wp_label(wp_index)}-{task_letters(task_index)}"
+
+def work_package_lines(wp_index: int, wp: Dict[str, Any]) -> List[str]:
+    """Heading, blank line and one checklist line per task for a work package.
+    A work package may carry a "done" list of flags parallel to its tasks.
+    """
+    done = wp.get("done") or []
+    lines = [f"## {wp_label(wp_index)}: {wp['title']}", ""]
+    for j, task in enumerate(wp["tasks"]):
+        mark = "x" if j < len(done) and done[j] else " "
+        lines.append(f"- [{mark}] {task_label(wp_index, j)}: {task}")
+    return lines
+
+def render_plan_markdown(plan_data: Dict[str, Any]) -> str:
+    """Render a structured plan as the markdown used for export"""
+    md_content = "# Development Plan\n\n"
+    md_content += plan_data.get("overview", "")
+    md_content += "\n\n# Work Packages\n\n"
+    for i, wp in enumerate(plan_data.get("work_packages", [])):
+        md_content += "\n".join(work_package_lines(i, wp)) + "\n\n"
+    return md_content
+
+WP_HEADING = re.compile(r"## WP\d+: (.*)")
+TASK_LINE = re.compile(r"- \[([ xX])\] WP\d+-[A-Z]+: (.*)")
+OVERVIEW_START = "# Development Plan"
+OVERVIEW_END = "# Work Packages"
+
+def parse_plan_markdown(markdown_content: str) -> Dict[str, Any]:
+    """Parse a markdown plan back into the structured format in a single pass.
+
+    Checked tasks ("- [x]") are kept and flagged in the work package's "done"
+    list, and indented lines under a task (nested bullets) are appended to it.
+    """
+    overview_lines: Optional[List[str]] = None
+    overview = ""
+    work_packages = []
+    wp = None
+    task_open = False
+
+    for line in markdown_content.split("\n"):
+        if "## WP" in line:
+            heading = WP_HEADING.search(line)
+            if heading:
+                wp = {"title": heading.group(1).strip(), "tasks": []}
+                work_packages.append(wp)
+                task_open = False
+                continue
+
+        if wp is None:
+            # Overview: everything between the two top-level headings
+            if overview_lines is None:
+                if OVERVIEW_START in line and not overview:
+                    overview_lines = [line[line.index(OVERVIEW_START) + len(OVERVIEW_START):]]
+            elif OVERVIEW_END in line:
+                overview_lines.append(line[:line.index(OVERVIEW_END)])
+                overview = "\n".join(overview_lines).strip()
+                overview_lines = None
+            else:
+                overview_lines.append(line)
+            continue
+
+        if "] WP" in line:
+            task = TASK_LINE.search(line)
+            if task:
+                if task.group(1) != " ":
+                    done = wp.setdefault("done", [])
+                    done.extend([False] * (len(wp["tasks"]) - len(done)))
+                    done.append(True)
+                elif "done" in wp:
+                    wp["done"].append(False)
+                wp["tasks"].append(task.group(2))
+                task_open = True
+                continue
+
+        if task_open and line[:1] in (" ", "\t") and line.strip():
+            wp["tasks"][-1] += "\n" + line
+        else:
+            task_open = False
+
+    # Return in the same format as generate_plan
+    return {
+        "overview": overview,
+        "work_packages": work_packages,
+        "plan": markdown_content,
+        "path": ""  # Will be filled in from history if available
+    }
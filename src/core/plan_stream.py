@@ -0,0 +1,160 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+class PlanStreamParser:
+    """Incremental parser for the plan JSON returned by the planner model.
+
+    Text is fed in as it streams. The parser tracks just enough JSON structure
+    (strings, nesting and object keys) to emit the overview as soon as its
+    string closes and each work package as soon as its object closes, without
+    waiting for the rest of the document. If the response is cut off or has a
+    malformed tail, finish() rebuilds the plan from everything that did parse.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.overview: Optional[str] = None
+        self.work_packages: List[Dict[str, Any]] = []
+        self.recovered = False
+
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._pos = 0
+        # One [bracket, key] entry per open container; key is the object key it sits under
+        self._stack: List[List[Optional[str]]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._last_key: Optional[str] = None
+        self._wp_start: Optional[int] = None
+
+    def _in_work_packages(self) -> bool:
+        """True when the innermost open container is the top-level work_packages array"""
+        return len(self._stack) == 2 and self._stack[1] == ["[", "work_packages"]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return ("overview", str) / ("work_package", dict)
+        events for every value completed by it.
+        """
+        self.text += chunk
+        events: List[Tuple[str, Any]] = []
+        if self._root_end is not None:
+            return events
+        if self._root_start is None:
+            start = self.text.find("{", self._pos)
+            if start < 0:
+                self._pos = len(self.text)
+                return events
+            self._root_start = self._pos = start
+
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(text[self._string_start:i + 1], events)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                parent_is_object = bool(self._stack) and self._stack[-1][0] == "{"
+                if c == "{" and self._in_work_packages():
+                    self._wp_start = i
+                self._stack.append([c, self._last_key if parent_is_object else None])
+                self._expect_key = c == "{"
+            elif c in "}]":
+                closed = self._stack.pop()
+                if closed[0] == "{" and self._wp_start is not None and self._in_work_packages():
+                    self._emit_work_package(text[self._wp_start:i + 1], events)
+                    self._wp_start = None
+                if not self._stack:
+                    self._root_end = i + 1
+                    break
+                self._expect_key = False
+            elif c == ",":
+                self._expect_key = self._stack[-1][0] == "{"
+
+        self._pos = len(text) if self._root_end is None else self._root_end
+        return events
+
+    def _end_string(self, literal: str, events: List[Tuple[str, Any]]):
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            # Invalid escapes; the work package containing it is dropped on emit
+            value = None
+        if self._stack[-1][0] == "{" and self._expect_key:
+            self._last_key = value
+            self._expect_key = False
+        elif len(self._stack) == 1 and self._last_key == "overview" and self.overview is None and value is not None:
+            self.overview = value
+            events.append(("overview", self.overview))
+
+    def _emit_work_package(self, literal: str, events: List[Tuple[str, Any]]):
+        try:
+            work_package = json.loads(literal)
+        except json.JSONDecodeError:
+            return
+        if isinstance(work_package, dict) and "title" in work_package:
+            work_package.setdefault("tasks", [])
+            self.work_packages.append(work_package)
+            events.append(("work_package", work_package))
+
+    def _salvage_partial(self) -> Optional[Dict[str, Any]]:
+        """Close off a work package that was still open when the text ended"""
+        if self._wp_start is None:
+            return None
+        literal = self.text[self._wp_start:]
+        if self._in_string:
+            literal = literal.rstrip("\\") + '"'
+        literal = literal.rstrip().rstrip(",")
+        closers = "".join("}" if bracket == "{" else "]" for bracket, _ in reversed(self._stack[2:]))
+        # If the text ends mid-key (e.g. after '"tasks":'), retry without the last member
+        for candidate in (literal, literal[:literal.rfind(",")]):
+            try:
+                work_package = json.loads(candidate + closers)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(work_package, dict) and work_package.get("title"):
+                work_package.setdefault("tasks", [])
+                return work_package
+        return None
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Return {"overview", "work_packages"} for the full response, or None if
+        nothing usable was found. Sets recovered when the plan had to be rebuilt
+        from a truncated or malformed response.
+        """
+        if self._root_end is not None:
+            try:
+                plan_data = json.loads(self.text[self._root_start:self._root_end])
+                if isinstance(plan_data, dict) and "work_packages" in plan_data:
+                    plan_data.setdefault("overview", self.overview or "")
+                    return plan_data
+            except json.JSONDecodeError:
+                pass
+
+        work_packages = list(self.work_packages)
+        partial = self._salvage_partial()
+        if partial:
+            work_packages.append(partial)
+
+        overview = self.overview
+        if overview is None and self._in_string and len(self._stack) == 1 and self._last_key == "overview":
+            try:
+                overview = json.loads(self.text[self._string_start:].rstrip("\\") + '"')
+            except json.JSONDecodeError:
+                overview = None
+
+        if overview is None and not work_packages:
+            return None
+        self.recovered = True
+        return {"overview": overview or "", "work_packages": work_packages}
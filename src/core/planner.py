@@ -1,16 +1,40 @@
 import os
-import re
-from datetime import datetime
+import uuid
+from typing import Any, AsyncIterator, Tuple
 from src.config import config
+from src.core.plan_stream import PlanStreamParser
 from src.models.router import ModelRouter
+from src.core.plan_markdown import parse_plan_markdown
+from src.storage.plan_store import get_plan_records
+
+CLARIFICATION_SYSTEM_MESSAGE = "You are an expert project planner who helps refine project requirements."
+BRIEF_SYSTEM_MESSAGE = "You are an expert project requirements analyst who creates clear, comprehensive project briefs without any preamble text."
 
 class ProjectPlanner:
-    def __init__(self):
-        self.model_router = ModelRouter()
+    def __init__(self, model_router: ModelRouter = None):
+        # Accept a shared router so callers don't rebuild every chat model per planner
+        self.model_router = model_router or ModelRouter()
     
     async def generate_clarification_questions(self, project_description: str):
         """Generate clarification questions based on the initial project description"""
-        prompt = f"""
+        response = await self.model_router.generate_response(
+            "planner", 
+            self._clarification_prompt(project_description),
+            system_message=CLARIFICATION_SYSTEM_MESSAGE
+        )
+        return self.parse_clarification_questions(response)
+    
+    def stream_clarification_questions(self, project_description: str) -> AsyncIterator[str]:
+        """Stream the raw clarification questions response; parse it with parse_clarification_questions"""
+        return self.model_router.stream_response(
+            "planner",
+            self._clarification_prompt(project_description),
+            system_message=CLARIFICATION_SYSTEM_MESSAGE
+        )
+    
+    @staticmethod
+    def _clarification_prompt(project_description: str) -> str:
+        return f"""
         Based on the following initial project description, generate a maximum of 5 important 
         clarification questions that would help refine the requirements. Format 
         each question as a JSON object with "id", "question", "type" (one of: "yes_no", 
@@ -46,14 +70,10 @@ class ProjectPlanner:
         
         Generate appropriate questions that will help clarify the project requirements.
         """
-        
-        # Generate and parse the response
-        response = await self.model_router.generate_response(
-            "planner", 
-            prompt,
-            system_message="You are an expert project planner who helps refine project requirements."
-        )
-        
+    
+    @staticmethod
+    def parse_clarification_questions(response: str):
+        """Parse the clarification questions out of a model response"""
         # Parse the response as JSON
         import json
         try:
@@ -71,11 +91,26 @@ class ProjectPlanner:
     
     async def generate_refined_brief(self, project_description: str, clarification_answers: dict):
         """Generate a refined project brief based on the initial description and clarification answers"""
-        
+        return await self.model_router.generate_response(
+            "planner", 
+            self._refined_brief_prompt(project_description, clarification_answers),
+            system_message=BRIEF_SYSTEM_MESSAGE
+        )
+    
+    def stream_refined_brief(self, project_description: str, clarification_answers: dict) -> AsyncIterator[str]:
+        """Stream the refined project brief as it is generated"""
+        return self.model_router.stream_response(
+            "planner",
+            self._refined_brief_prompt(project_description, clarification_answers),
+            system_message=BRIEF_SYSTEM_MESSAGE
+        )
+    
+    @staticmethod
+    def _refined_brief_prompt(project_description: str, clarification_answers: dict) -> str:
         # Format the clarification answers for the prompt
         answers_text = "\n".join([f"Q: {q_id}\nA: {answer}" for q_id, answer in clarification_answers.items()])
         
-        prompt = f"""
+        return f"""
         Based on the initial project description and the clarification answers provided,
         create a comprehensive and refined project brief. 
         
@@ -91,19 +126,29 @@ class ProjectPlanner:
         Write a specific, detailed project brief that clearly defines scope, objectives, features, 
         and technical requirements.
         """
-        
-        # Generate the refined brief
-        response = await self.model_router.generate_response(
-            "planner", 
-            prompt,
-            system_message="You are an expert project requirements analyst who creates clear, comprehensive project briefs without any preamble text."
-        )
-        
-        return response
     
     async def generate_plan(self, project_description: str):
         """Generate a new development plan from user requirements"""
-        prompt = f"""
+        # Generate the plan with the new structure
+        response = await self.model_router.generate_response("planner", self._plan_prompt(project_description))
+        return self.build_plan(response)
+    
+    async def stream_plan(self, project_description: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream plan generation as (kind, value) events.
+        Yields ("token", text) for raw output, ("overview", str) and ("work_package", dict)
+        as soon as each is complete in the stream, and finally ("plan", result) with
+        the saved plan in the same format as generate_plan.
+        """
+        parser = PlanStreamParser()
+        async for chunk in self.model_router.stream_response("planner", self._plan_prompt(project_description)):
+            yield "token", chunk
+            for event in parser.feed(chunk):
+                yield event
+        yield "plan", self._plan_result(parser)
+    
+    @staticmethod
+    def _plan_prompt(project_description: str) -> str:
+        return f"""
         Create a detailed development plan for the following project:
         
         {project_description}
@@ -133,88 +178,35 @@ class ProjectPlanner:
         2. Break down each work package into specific, actionable tasks
         3. Ensure tasks are granular enough to be completed in 1-3 days
         """
-        
-        # Generate the plan with the new structure
-        response = await self.model_router.generate_response("planner", prompt)
-        
-        # Parse the response as JSON
-        import json
-        try:
-            # Find JSON content in the response
-            start = response.find("{")
-            end = response.rfind("}") + 1
-            
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                plan_data = json.loads(json_str)
-                
-                # Save plan to file
-                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                plan_path = config.PATHS["plans"] / f"plan-{timestamp}.md"
-                
-                # Create a markdown version for saving
-                md_content = f"# Development Plan\n\n"
-                md_content += plan_data["overview"]
-                md_content += "\n\n# Work Packages\n\n"
-                
-                for i, wp in enumerate(plan_data["work_packages"]):
-                    md_content += f"## WP{i+1:03d}: {wp['title']}\n\n"
-                    for j, task in enumerate(wp["tasks"]):
-                        md_content += f"- [ ] WP{i+1:03d}-{chr(65+j)}: {task}\n"
-                    md_content += "\n"
-                
-                with open(plan_path, "w") as f:
-                    f.write(md_content)
-                
-                # Return both the structured data and the markdown version
-                return {
-                    "overview": plan_data["overview"],
-                    "work_packages": plan_data["work_packages"],
-                    "plan": md_content,
-                    "path": str(plan_path)
-                }
-            
-            return {"overview": "Error parsing plan", "work_packages": [], "plan": "Error parsing plan"}
-        except json.JSONDecodeError:
-            # Fallback for parsing errors
-            return {"overview": "Error parsing plan", "work_packages": [], "plan": response}
     
-    def parse_markdown_plan(self, markdown_content: str):
-        """Parse a markdown plan file back into the structured format"""
-        # Extract overview section (everything between # Development Plan and # Work Packages)
-        overview_match = re.search(r'# Development Plan\s+(.*?)\s+# Work Packages', 
-                                  markdown_content, re.DOTALL)
-        overview = overview_match.group(1).strip() if overview_match else ""
-        
-        # Extract work packages
-        work_packages = []
-        
-        # Find all work package sections
-        wp_sections = re.findall(r'## WP\d+: (.*?)(?=## WP\d+:|$)', markdown_content + "\n## WP999:", re.DOTALL)
+    def build_plan(self, response: str):
+        """Parse a complete plan response, save it as markdown and return the structured plan"""
+        parser = PlanStreamParser()
+        parser.feed(response)
+        return self._plan_result(parser)
+    
+    def _plan_result(self, parser: PlanStreamParser):
+        """Save the plan parsed from a response, recovering what it can from a malformed one"""
+        plan_data = parser.finish()
+        if plan_data is None:
+            # Fallback for parsing errors
+            return {"overview": "Error parsing plan", "work_packages": [], "plan": parser.text}
         
-        for wp_section in wp_sections:
-            lines = wp_section.strip().split('\n')
-            if not lines:
-                continue
-                
-            title = lines[0].strip()
-            tasks = []
-            
-            # Extract tasks
-            for line in lines[1:]:
-                task_match = re.search(r'- \[ \] WP\d+-[A-Z]: (.*)', line)
-                if task_match:
-                    tasks.append(task_match.group(1))
-            
-            work_packages.append({
-                "title": title,
-                "tasks": tasks
-            })
+        # Save the plan as a structured record; markdown is rendered on demand
+        project_id = str(uuid.uuid4())
+        plan_records = get_plan_records()
+        version = plan_records.save(project_id, plan_data)
         
-        # Return in the same format as generate_plan
         return {
-            "overview": overview,
-            "work_packages": work_packages,
-            "plan": markdown_content,
-            "path": ""  # Will be filled in from history if available
-        }
\ No newline at end of file
+            "id": project_id,
+            "overview": plan_data["overview"],
+            "work_packages": plan_data["work_packages"],
+            "path": str(plan_records.path(project_id)),
+            "version": version,
+            "recovered": parser.recovered
+        }
+    
+    @staticmethod
+    def parse_markdown_plan(markdown_content: str):
+        """Parse a markdown plan file back into the structured format"""
+        return parse_plan_markdown(markdown_content)
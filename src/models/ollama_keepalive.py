@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+import urllib.request
+from datetime import datetime, time as dt_time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+def parse_hours(spec: str) -> Tuple[dt_time, dt_time]:
+    """Parse "08:00-18:00" into start and end times."""
+    start, end = spec.split("-")
+    return dt_time.fromisoformat(start.strip()), dt_time.fromisoformat(end.strip())
+
+def parse_days(spec: str) -> Set[int]:
+    """Parse weekday numbers (Monday is 0) like "0-4" or "0,2,4"."""
+    days = set()
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            days.update(range(int(first), int(last) + 1))
+        elif part.strip():
+            days.add(int(part))
+    return days
+
+class OllamaKeepAlive:
+    """Keeps an Ollama model resident in memory.
+
+    warm_up() sends a one-token generation so the model is loaded before the
+    first real request, and start() does that in the background, then pings
+    every ping_interval seconds during business hours. Each request asks Ollama
+    to keep the model loaded for keep_alive. Ollama reports load and inference
+    durations separately, and both are recorded.
+    """
+
+    def __init__(self, model: str, base_url: str = "http://localhost:11434", keep_alive: str = "30m",
+                 ping_interval: float = 600.0, business_hours: str = "08:00-18:00",
+                 business_days: str = "0-4", timeout: float = 300.0,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.business_hours = parse_hours(business_hours)
+        self.business_days = parse_days(business_days)
+        self.timeout = timeout
+        self.clock = clock
+
+        self.results: List[Dict[str, Any]] = []
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, **overrides) -> "OllamaKeepAlive":
+        """A keep-alive for the default model, configured from config.OLLAMA"""
+        from src.config import config
+        settings = {
+            "base_url": config.OLLAMA["base_url"],
+            "keep_alive": config.OLLAMA["keep_alive"],
+            "ping_interval": config.OLLAMA["ping_interval"],
+            "business_hours": config.OLLAMA["business_hours"],
+            "business_days": config.OLLAMA["business_days"],
+        }
+        settings.update(overrides)
+        return cls(config.OLLAMA["default_model"], **settings)
+
+    def in_business_hours(self, now: Optional[datetime] = None) -> bool:
+        now = now or self.clock()
+        start, end = self.business_hours
+        return now.weekday() in self.business_days and start <= now.time() < end
+
+    def warm_up(self) -> Optional[Dict[str, Any]]:
+        """Load the model (or refresh its keep-alive) and return the measured latencies."""
+        payload = json.dumps({
+            "model": self.model,
+            "prompt": "ping",
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": 1},
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/api/generate", data=payload,
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read())
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Ollama warm-up for {self.model} failed: {str(e)}")
+            return None
+
+        # Ollama reports durations in nanoseconds
+        result = {
+            "at": self.clock().isoformat(timespec="seconds"),
+            "round_trip": time.perf_counter() - started,
+            "load": body.get("load_duration", 0) / 1e9,
+            "inference": (body.get("prompt_eval_duration", 0) + body.get("eval_duration", 0)) / 1e9,
+            "total": body.get("total_duration", 0) / 1e9,
+        }
+        self.results = (self.results + [result])[-100:]
+        self.last_error = None
+        return result
+
+    def _run(self):
+        self.warm_up()
+        while not self._stop.wait(self.ping_interval):
+            if self.in_business_hours():
+                self.warm_up()
+
+    def start(self):
+        """Warm up in the background and keep pinging until stop()."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ollama-keepalive", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Load and inference latency of warm-ups and pings, reported separately."""
+        stats = {
+            "model": self.model,
+            "requests": len(self.results),
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+        if self.results:
+            first, last = self.results[0], self.results[-1]
+            stats.update({
+                "first_load": first["load"],
+                "first_inference": first["inference"],
+                "last_load": last["load"],
+                "last_inference": last["inference"],
+                "last_at": last["at"],
+            })
+        return stats
@@ -0,0 +1,234 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+class PerLoop:
+    """One asyncio primitive per running event loop, created on first use there.
+    asyncio locks and semaphores bind to the loop that first waits on them, so a
+    guard shared across loops (the background loop, asyncio.run in CLI tools and
+    benchmarks) can't hold a single instance.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            instance = self._instances.get(loop)
+            if instance is None:
+                instance = self._instances[loop] = self.factory()
+            return instance
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+class TokenBucket:
+    """Async token bucket allowing `rate` requests per second with bursts up to `capacity`.
+    A rate of zero or less disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._locks = PerLoop(asyncio.Lock)
+        # Callers on different loops share the tokens
+        self._state_lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        if self.rate <= 0:
+            return
+        async with self._locks.get():
+            while True:
+                with self._state_lock:
+                    self._refill()
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls until
+    `reset_timeout` has passed; then lets a single trial call through (half-open)
+    and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return self.state != self.OPEN
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+
+    def release(self):
+        """Forget a call that was cancelled without succeeding or failing"""
+        self._trial_in_flight = False
+
+class ProviderGuard:
+    """Rate limit, concurrency cap, retry budget and circuit breaker for one provider.
+
+    Failed calls are retried with full-jitter exponential backoff, but only while
+    the retry budget allows: every request earns `retry_budget` of a retry, so a
+    failing provider can't multiply load by more than that ratio. The concurrency
+    cap applies per event loop; the app runs every call on the background loop.
+    """
+
+    def __init__(self, name: str, rate: float = 0.0, max_concurrency: int = 4,
+                 max_retries: int = 2, retry_base_delay: float = 0.5, retry_max_delay: float = 8.0,
+                 retry_budget: float = 0.2, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.bucket = TokenBucket(rate)
+        self.max_concurrency = max_concurrency
+        self._semaphores = PerLoop(lambda: asyncio.Semaphore(max_concurrency))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.retry_budget = retry_budget
+
+        self._retry_tokens = 1.0
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.in_flight = 0
+
+    def _admit(self) -> bool:
+        """Reject the call up front while the circuit is open; True if the call
+        is the half-open trial, which must be released if it is cancelled
+        """
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise CircuitOpenError(f"Circuit open for provider {self.name}")
+        self.requests += 1
+        self._retry_tokens = min(10.0, self._retry_tokens + self.retry_budget)
+        return self.breaker.state == CircuitBreaker.HALF_OPEN
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        """Sleep before a retry, or re-raise the error if no retry is allowed"""
+        if attempt >= self.max_retries or self._retry_tokens < 1 or self.breaker.state == CircuitBreaker.OPEN:
+            raise error
+        self._retry_tokens -= 1
+        self.retries += 1
+        cap = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+        await asyncio.sleep(random.uniform(0, cap))
+
+    def _failed(self):
+        self.failures += 1
+        self.breaker.record_failure()
+
+    async def call(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await factory() under the guard, retrying failures while allowed"""
+        attempt = 0
+        while True:
+            trial = self._admit()
+            error = None
+            try:
+                # Cancelled while waiting for a token or a slot, or during the call
+                await self.bucket.acquire()
+                async with self._semaphores.get():
+                    self.in_flight += 1
+                    try:
+                        result = await factory()
+                    except Exception as e:
+                        self._failed()
+                        error = e
+                    else:
+                        self.breaker.record_success()
+                        return result
+                    finally:
+                        self.in_flight -= 1
+            except asyncio.CancelledError:
+                if trial:
+                    self.breaker.release()
+                raise
+            await self._backoff(attempt, error)
+            attempt += 1
+
+    async def stream(self, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate factory() under the guard; only failures before the first item are retried"""
+        attempt = 0
+        while True:
+            trial = self._admit()
+            error = None
+            try:
+                # Cancelled or closed while waiting for a token or a slot, or mid-stream
+                await self.bucket.acquire()
+                async with self._semaphores.get():
+                    self.in_flight += 1
+                    produced = False
+                    try:
+                        async for item in factory():
+                            produced = True
+                            yield item
+                    except Exception as e:
+                        self._failed()
+                        if produced:
+                            raise
+                        error = e
+                    else:
+                        self.breaker.record_success()
+                        return
+                    finally:
+                        self.in_flight -= 1
+            except (asyncio.CancelledError, GeneratorExit):
+                if trial:
+                    self.breaker.release()
+                raise
+            await self._backoff(attempt, error)
+            attempt += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters and circuit state for display"""
+        return {
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "times_opened": self.breaker.times_opened,
+            "in_flight": self.in_flight,
+        }
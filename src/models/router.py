@@ -1,173 +1,563 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any
 from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from src.config import config
+from src.models.resilience import ProviderGuard
+from src.storage.sqlite_cache import SQLiteCache
 
-# Handle OpenAI imports properly
-OPENAI_AVAILABLE = False
-try:
-    from langchain_openai import ChatOpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
+# Provider packages are imported on first use, so a session only pays the import
+# cost of the providers it actually talks to
+
+def _import_chat_openai():
+    """Import ChatOpenAI from whichever LangChain package provides it, or return None."""
+    try:
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI
+    except ImportError:
+        pass
     try:
         from langchain_community.chat_models import ChatOpenAI
-        OPENAI_AVAILABLE = True
+        return ChatOpenAI
     except ImportError:
-        # Fall back to deprecated import path
-        try:
-            from langchain.chat_models import ChatOpenAI
-            OPENAI_AVAILABLE = True
-        except ImportError:
-            pass
+        pass
+    # Fall back to deprecated import path
+    try:
+        from langchain.chat_models import ChatOpenAI
+        return ChatOpenAI
+    except ImportError:
+        return None
 
-# Handle Ollama imports properly
-OLLAMA_AVAILABLE = False
-try:
-    from langchain_community.chat_models import ChatOllama
-    OLLAMA_AVAILABLE = True
-except ImportError:
+def _import_chat_ollama():
+    """Import ChatOllama from whichever LangChain package provides it, or return None."""
     try:
-        from langchain.chat_models import ChatOllama
-        OLLAMA_AVAILABLE = True
+        from langchain_community.chat_models import ChatOllama
+        return ChatOllama
     except ImportError:
         pass
+    try:
+        from langchain.chat_models import ChatOllama
+        return ChatOllama
+    except ImportError:
+        return None
 
-# Optional Anthropic support
-ANTHROPIC_AVAILABLE = False
-try:
-    from langchain_anthropic import ChatAnthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    pass
+def _import_chat_anthropic():
+    """Import ChatAnthropic (optional support), or return None."""
+    try:
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic
+    except ImportError:
+        return None
 
 class ModelRouter:
-    """A router to handle different LLM models based on configuration."""
+    """A router to handle different LLM models based on configuration.
+    Model clients are created on first use rather than at construction.
+    """
     
-    DEFAULT_MODEL = "gemma3:12b"
+    DEFAULT_MODEL = config.OLLAMA["default_model"]
     
-    def __init__(self):
+    def __init__(self, warm_up: bool = False):
         self.models: Dict[str, BaseChatModel] = {}
-        self._initialize_models()
-    
-    def _initialize_models(self):
-        """Initialize the configured models."""
-        # First try to initialize the default Ollama model
-        self._initialize_default_model()
-        
-        # Then initialize other configured models
-        for model_type, model_name in config.MODELS.items():
-            if model_name.startswith("gpt"):
-                # OpenAI models
-                if not OPENAI_AVAILABLE:
-                    raise ImportError(
-                        "To use OpenAI models, please install langchain-openai: "
-                        "pip install langchain-openai"
-                    )
-                
-                # Check for API key
-                api_key = os.environ.get("OPENAI_API_KEY", config.API_KEYS.get("openai"))
-                if not api_key:
-                    # For development, skip initializing this model but don't crash
-                    print(f"Skipping {model_name} initialization: No OpenAI API key found")
-                    continue
+        self._unavailable: set = set()
+        self._models_lock = threading.Lock()
+        self.latency_stats: Dict[str, Dict[str, float]] = {}
+        self.guards: Dict[str, ProviderGuard] = {}
+        self.response_cache: Optional[SQLiteCache] = None
+        if config.CACHE["llm_enabled"]:
+            self.response_cache = SQLiteCache(
+                config.PATHS["data"] / "llm_cache.sqlite3",
+                max_entries=config.CACHE["llm_max_entries"],
+                memory_entries=config.CACHE["llm_memory_entries"],
+                ttl=config.CACHE["llm_ttl"],
+            )
+        if warm_up:
+            self.warm_up()
+    
+    def warm_up(self, background: bool = True):
+        """Create every configured model client ahead of first use."""
+        def create_all():
+            for model_type in ["default", *config.MODELS]:
+                try:
+                    self._load_model(model_type)
+                except Exception as e:
+                    print(f"Failed to warm up {model_type} model: {str(e)}")
+        
+        if background:
+            threading.Thread(target=create_all, name="model-warm-up", daemon=True).start()
+        else:
+            create_all()
+    
+    def _load_model(self, model_type: str) -> Optional[BaseChatModel]:
+        """Get the client for a model type, creating it on first use.
+        Returns None if the model type can't be used (not configured, missing
+        package or API key); that outcome is remembered too.
+        """
+        model = self.models.get(model_type)
+        if model is not None or model_type in self._unavailable:
+            return model
+        
+        with self._models_lock:
+            # Another thread may have created it while we waited
+            if model_type not in self.models and model_type not in self._unavailable:
+                if model_type == "default":
+                    model = self._create_default_model()
+                else:
+                    model = self._create_model(model_type)
                 
-                self.models[model_type] = ChatOpenAI(
-                    model=model_name,
-                    temperature=0.1,
-                    openai_api_key=api_key,
+                if model is None:
+                    self._unavailable.add(model_type)
+                else:
+                    self.models[model_type] = model
+        return self.models.get(model_type)
+    
+    def _has_default(self) -> bool:
+        return self._load_model("default") is not None
+    
+    def _create_model(self, model_type: str) -> Optional[BaseChatModel]:
+        """Create the client for a configured model type."""
+        model_name = config.MODELS.get(model_type)
+        if model_name is None:
+            return None
+        
+        if model_name.startswith("gpt"):
+            # OpenAI models
+            ChatOpenAI = _import_chat_openai()
+            if ChatOpenAI is None:
+                print(
+                    f"Skipping {model_name} initialization: to use OpenAI models, please install "
+                    "langchain-openai: pip install langchain-openai"
                 )
-            elif model_name.startswith("claude"):
-                # Anthropic models
-                if not ANTHROPIC_AVAILABLE:
-                    raise ImportError(
-                        "To use Claude models, please install langchain_anthropic: "
-                        "pip install langchain-anthropic"
-                    )
-                
-                # Check for API key
-                api_key = os.environ.get("ANTHROPIC_API_KEY", config.API_KEYS.get("anthropic"))
-                if not api_key:
-                    # For development, skip initializing this model but don't crash
-                    print(f"Skipping {model_name} initialization: No Anthropic API key found")
-                    continue
-                
-                self.models[model_type] = ChatAnthropic(
-                    model=model_name,
-                    temperature=0.1,
-                    anthropic_api_key=api_key,
+                return None
+            
+            # Check for API key
+            api_key = os.environ.get("OPENAI_API_KEY", config.API_KEYS.get("openai"))
+            if not api_key:
+                # For development, skip initializing this model but don't crash
+                print(f"Skipping {model_name} initialization: No OpenAI API key found")
+                return None
+            
+            return ChatOpenAI(
+                model=model_name,
+                temperature=0.1,
+                openai_api_key=api_key,
+            )
+        elif model_name.startswith("claude"):
+            # Anthropic models
+            ChatAnthropic = _import_chat_anthropic()
+            if ChatAnthropic is None:
+                print(
+                    f"Skipping {model_name} initialization: to use Claude models, please install "
+                    "langchain_anthropic: pip install langchain-anthropic"
                 )
-            elif model_name.startswith("local-"):
-                # Local models via Ollama
-                if not OLLAMA_AVAILABLE:
-                    raise ImportError(
-                        "To use local models, please install langchain-community: "
-                        "pip install langchain-community"
-                    )
-                
-                actual_model = model_name.replace("local-", "")
-                self.models[model_type] = ChatOllama(
-                    model=actual_model,
-                    temperature=0.1,
+                return None
+            
+            # Check for API key
+            api_key = os.environ.get("ANTHROPIC_API_KEY", config.API_KEYS.get("anthropic"))
+            if not api_key:
+                # For development, skip initializing this model but don't crash
+                print(f"Skipping {model_name} initialization: No Anthropic API key found")
+                return None
+            
+            return ChatAnthropic(
+                model=model_name,
+                temperature=0.1,
+                anthropic_api_key=api_key,
+            )
+        elif model_name.startswith("local-"):
+            # Local models via Ollama
+            ChatOllama = _import_chat_ollama()
+            if ChatOllama is None:
+                print(
+                    f"Skipping {model_name} initialization: to use local models, please install "
+                    "langchain-community: pip install langchain-community"
                 )
+                return None
+            
+            actual_model = model_name.replace("local-", "")
+            return ChatOllama(
+                model=actual_model,
+                temperature=0.1,
+                base_url=config.OLLAMA["base_url"],
+                keep_alive=config.OLLAMA["keep_alive"],
+            )
+        return None
 
-    def _initialize_default_model(self):
-        """Initialize the default Ollama model."""
-        if not OLLAMA_AVAILABLE:
+    def _create_default_model(self) -> Optional[BaseChatModel]:
+        """Create the default Ollama model."""
+        ChatOllama = _import_chat_ollama()
+        if ChatOllama is None:
             print(f"Cannot initialize default Ollama model: langchain-community not available")
-            return
+            return None
         
         try:
             default_model = ChatOllama(
                 model=self.DEFAULT_MODEL,
                 temperature=0.1,
+                base_url=config.OLLAMA["base_url"],
+                keep_alive=config.OLLAMA["keep_alive"],
             )
-            self.models["default"] = default_model
             print(f"Successfully initialized default model: {self.DEFAULT_MODEL}")
+            return default_model
         except Exception as e:
             print(f"Failed to initialize default model {self.DEFAULT_MODEL}: {str(e)}")
+            return None
     
     def get_model(self, model_type: str) -> BaseChatModel:
-        """Get the model instance for the specified type.
+        """Get the model instance for the specified type, creating it on first use.
         Falls back to default Ollama model if the requested model is unavailable.
         """
-        if model_type in self.models:
-            return self.models[model_type]
-        elif "default" in self.models:
+        model = self._load_model(model_type)
+        if model is not None:
+            return model
+        elif self._has_default():
             print(f"Model type {model_type} not configured, falling back to default model")
             return self.models["default"]
         else:
             raise ValueError(f"Model type {model_type} not configured and default model unavailable")
     
+    def _build_chain(self, model: BaseChatModel, system_message: Optional[str] = None):
+        """Build a prompt | model | parser chain for a single human input."""
+        # Create a chat prompt template
+        if system_message:
+            prompt_template = ChatPromptTemplate.from_messages([
+                ("system", system_message),
+                ("human", "{input}")
+            ])
+        else:
+            prompt_template = ChatPromptTemplate.from_messages([
+                ("human", "{input}")
+            ])
+        
+        # Create a simple chain
+        return prompt_template | model | StrOutputParser()
+    
+    @staticmethod
+    def model_name(model: BaseChatModel) -> str:
+        """The provider's name for a model instance, e.g. gpt-4o or gemma3:12b."""
+        return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+    
+    def _record_latency(self, model: BaseChatModel, first_token: float, total: float):
+        """Record time-to-first-token and total generation time for a streamed response."""
+        stats = self.latency_stats.setdefault(self.model_name(model), {
+            "requests": 0, "ttft_total": 0.0, "total_time": 0.0, "last_ttft": 0.0,
+        })
+        stats["requests"] += 1
+        stats["ttft_total"] += first_token
+        stats["total_time"] += total
+        stats["last_ttft"] = first_token
+    
+    def latency_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Average time-to-first-token and generation time per model, in seconds."""
+        return {
+            name: {
+                "requests": stats["requests"],
+                "avg_ttft": stats["ttft_total"] / stats["requests"],
+                "last_ttft": stats["last_ttft"],
+                "avg_total": stats["total_time"] / stats["requests"],
+            }
+            for name, stats in self.latency_stats.items()
+        }
+    
+    @staticmethod
+    def provider_name(model: BaseChatModel) -> str:
+        """The provider behind a model instance: openai, anthropic or ollama."""
+        class_name = type(model).__name__
+        for provider in ("openai", "anthropic", "ollama"):
+            if provider in class_name.lower():
+                return provider
+        return class_name
+    
+    def _guard(self, model: BaseChatModel) -> ProviderGuard:
+        """The rate limiter, retry budget and circuit breaker for a model's provider."""
+        provider = self.provider_name(model)
+        if provider not in self.guards:
+            settings = config.RESILIENCE
+            self.guards[provider] = ProviderGuard(
+                provider,
+                rate=settings["rate_limits"].get(provider, 0.0),
+                max_concurrency=settings["max_concurrency"],
+                max_retries=settings["max_retries"],
+                retry_base_delay=settings["retry_base_delay"],
+                retry_budget=settings["retry_budget"],
+                failure_threshold=settings["failure_threshold"],
+                reset_timeout=settings["reset_timeout"],
+            )
+        return self.guards[provider]
+    
+    def provider_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit state and request counters per provider."""
+        return {provider: guard.metrics() for provider, guard in self.guards.items()}
+    
+    def _cache_key(self, model: BaseChatModel, prompt: str, system_message: Optional[str]) -> str:
+        """Cache key for a request: model name, system message, prompt and temperature."""
+        payload = json.dumps([
+            self.model_name(model), system_message, prompt, getattr(model, "temperature", None)
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _cached_response(self, key: str, use_cache: bool) -> Optional[str]:
+        if not use_cache or self.response_cache is None:
+            return None
+        value = self.response_cache.get(key)
+        return value.decode("utf-8") if value is not None else None
+    
+    def _cache_response(self, key: str, response: str, use_cache: bool):
+        if use_cache and self.response_cache is not None and response:
+            self.response_cache.set(key, response.encode("utf-8"))
+    
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Response cache counters, or None if the cache is disabled."""
+        return self.response_cache.stats() if self.response_cache is not None else None
+    
     async def generate_response(self, model_type: str, prompt: str, 
-                               system_message: Optional[str] = None) -> str:
+                               system_message: Optional[str] = None,
+                               use_cache: bool = True) -> str:
         """Generate a response from the specified model type.
-        Falls back to the default model if there's a problem with the specified model.
+        Identical requests are answered from the response cache unless use_cache is False.
+        Falls back to the default model if there's a problem with the specified model,
+        or races both concurrently when hedged requests are enabled.
         """
+        hedge_model = config.ROUTING["hedge_model"]
+        if config.ROUTING["hedge"] and model_type != hedge_model:
+            return await self.generate_hedged(
+                [model_type, hedge_model], prompt, system_message,
+                hedge_delay=config.ROUTING["hedge_delay"], use_cache=use_cache
+            )
+        
         try:
             model = self.get_model(model_type)
+            key = self._cache_key(model, prompt, system_message)
+            cached = self._cached_response(key, use_cache)
+            if cached is not None:
+                return cached
             
-            # Create a chat prompt template
-            if system_message:
-                prompt_template = ChatPromptTemplate.from_messages([
-                    ("system", system_message),
-                    ("human", "{input}")
-                ])
-            else:
-                prompt_template = ChatPromptTemplate.from_messages([
-                    ("human", "{input}")
-                ])
-            
-            # Create a simple chain
-            chain = prompt_template | model | StrOutputParser()
-            
-            # Run the chain
-            return await chain.ainvoke({"input": prompt})
+            # Run the chain; an open circuit raises immediately and we fall back below
+            response = await self._invoke(model_type, prompt, system_message)
+            self._cache_response(key, response, use_cache)
+            return response
         except Exception as e:
-            if model_type != "default" and "default" in self.models:
+            if model_type != "default" and self._has_default():
                 print(f"Error using {model_type}, falling back to default model: {str(e)}")
                 # Recursive call with the default model
-                return await self.generate_response("default", prompt, system_message)
+                return await self.generate_response("default", prompt, system_message, use_cache)
+            else:
+                raise e
+    
+    async def _invoke(self, model_type: str, prompt: str, system_message: Optional[str] = None) -> str:
+        """Run a single model type under its provider guard, without caching or fallback."""
+        model = self.get_model(model_type)
+        chain = self._build_chain(model, system_message)
+        return await self._guard(model).call(lambda: chain.ainvoke({"input": prompt}))
+    
+    def _distinct_model_types(self, model_types: List[str]) -> List[str]:
+        """Drop unavailable types and types that resolve to the same model instance,
+        so an unconfigured type falling back to default isn't raced against default.
+        """
+        distinct = {}
+        for model_type in model_types:
+            try:
+                model = self.get_model(model_type)
+            except ValueError:
+                continue
+            distinct.setdefault(id(model), model_type)
+        return list(distinct.values())
+    
+    async def generate_hedged(self, model_types: List[str], prompt: str,
+                              system_message: Optional[str] = None,
+                              hedge_delay: float = 0.0,
+                              validator: Optional[Callable[[str], bool]] = None,
+                              use_cache: bool = True) -> str:
+        """Send the same prompt to several model types and return the first valid answer.
+        Each further model starts after hedge_delay seconds without a valid answer
+        (immediately with the default of 0), or as soon as every running model has
+        failed. The remaining requests are cancelled once one answer is accepted.
+        """
+        validator = validator or (lambda response: bool(response and response.strip()))
+        model_types = self._distinct_model_types(model_types)
+        if not model_types:
+            raise ValueError("None of the requested model types are configured")
+        
+        key = self._cache_key(self.get_model(model_types[0]), prompt, system_message)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            return cached
+        
+        queue = list(model_types)
+        pending: Dict[asyncio.Task, str] = {}
+        errors: Dict[str, str] = {}
+        try:
+            while queue or pending:
+                if queue:
+                    model_type = queue.pop(0)
+                    pending[asyncio.create_task(self._invoke(model_type, prompt, system_message))] = model_type
+                
+                # Wait for an answer, or until it's time to hedge with the next model
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    model_type = pending.pop(task)
+                    if task.exception() is not None:
+                        errors[model_type] = str(task.exception())
+                    elif validator(task.result()):
+                        self._cache_response(key, task.result(), use_cache)
+                        return task.result()
+                    else:
+                        errors[model_type] = "invalid response"
+        finally:
+            # Cancel the losers
+            for task in pending:
+                task.cancel()
+        
+        raise RuntimeError(f"All hedged models failed: {errors}")
+    
+    async def generate_fanout(self, model_types: List[str], prompt: str,
+                              system_message: Optional[str] = None) -> Dict[str, Any]:
+        """Send the same prompt to several model types concurrently and gather every answer.
+        Maps each model type to its response, or to the exception it raised.
+        """
+        results = await asyncio.gather(
+            *(self._invoke(model_type, prompt, system_message) for model_type in model_types),
+            return_exceptions=True
+        )
+        return dict(zip(model_types, results))
+    
+    async def stream_response(self, model_type: str, prompt: str,
+                              system_message: Optional[str] = None,
+                              use_cache: bool = True) -> AsyncIterator[str]:
+        """Stream a response from the specified model type as it is generated.
+        A cached response is yielded in one piece unless use_cache is False.
+        Falls back to the default model if the specified model fails before
+        producing any output; failures mid-stream are raised to the caller.
+        With hedged requests enabled, the hedge model races it for the first token.
+        """
+        hedge_model = config.ROUTING["hedge_model"]
+        if config.ROUTING["hedge"] and model_type != hedge_model:
+            async for chunk in self.stream_hedged(
+                [model_type, hedge_model], prompt, system_message,
+                hedge_delay=config.ROUTING["hedge_delay"], use_cache=use_cache
+            ):
+                yield chunk
+            return
+        
+        produced = False
+        try:
+            model = self.get_model(model_type)
+            key = self._cache_key(model, prompt, system_message)
+            cached = self._cached_response(key, use_cache)
+            if cached is not None:
+                produced = True
+                yield cached
+                return
+            
+            chunks = []
+            async for chunk in self._stream(model_type, prompt, system_message):
+                produced = True
+                chunks.append(chunk)
+                yield chunk
+            self._cache_response(key, "".join(chunks), use_cache)
+        except Exception as e:
+            if not produced and model_type != "default" and self._has_default():
+                print(f"Error streaming from {model_type}, falling back to default model: {str(e)}")
+                async for chunk in self.stream_response("default", prompt, system_message, use_cache):
+                    yield chunk
             else:
-                raise e
\ No newline at end of file
+                raise e
+    
+    async def _stream(self, model_type: str, prompt: str,
+                      system_message: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a single model type under its provider guard, recording its latency,
+        without caching or fallback. Empty chunks are dropped.
+        """
+        model = self.get_model(model_type)
+        chain = self._build_chain(model, system_message)
+        
+        started = time.perf_counter()
+        first_token = None
+        async for chunk in self._guard(model).stream(lambda: chain.astream({"input": prompt})):
+            if not chunk:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            yield chunk
+        
+        if first_token is not None:
+            self._record_latency(model, first_token, time.perf_counter() - started)
+    
+    async def stream_hedged(self, model_types: List[str], prompt: str,
+                            system_message: Optional[str] = None,
+                            hedge_delay: float = 0.0,
+                            use_cache: bool = True) -> AsyncIterator[str]:
+        """Stream from whichever of several model types produces a first token first.
+        Each further model starts after hedge_delay seconds without a first token,
+        or as soon as every running model has failed. Once a model yields, the
+        others are cancelled and the rest of the response comes from it alone;
+        failures after that point are raised to the caller.
+        """
+        model_types = self._distinct_model_types(model_types)
+        if not model_types:
+            raise ValueError("None of the requested model types are configured")
+        
+        key = self._cache_key(self.get_model(model_types[0]), prompt, system_message)
+        cached = self._cached_response(key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+        
+        async def first_chunk(stream):
+            return await stream.__anext__()
+        
+        queue = list(model_types)
+        pending: Dict[asyncio.Task, tuple] = {}
+        errors: Dict[str, str] = {}
+        winner = None
+        try:
+            while winner is None and (queue or pending):
+                if queue:
+                    model_type = queue.pop(0)
+                    stream = self._stream(model_type, prompt, system_message)
+                    pending[asyncio.create_task(first_chunk(stream))] = (model_type, stream)
+                
+                # Wait for a first token, or until it's time to hedge with the next model
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    model_type, stream = pending.pop(task)
+                    if winner is not None:
+                        await stream.aclose()
+                    elif isinstance(task.exception(), StopAsyncIteration):
+                        errors[model_type] = "empty response"
+                    elif task.exception() is not None:
+                        errors[model_type] = str(task.exception())
+                    else:
+                        winner = (task.result(), stream)
+        finally:
+            # Cancel the losers; their streams can only be closed once the tasks have stopped
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, stream in pending.values():
+                await stream.aclose()
+        
+        if winner is None:
+            raise RuntimeError(f"All hedged models failed: {errors}")
+        
+        chunk, stream = winner
+        chunks = [chunk]
+        try:
+            yield chunk
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await stream.aclose()
+        self._cache_response(key, "".join(chunks), use_cache)
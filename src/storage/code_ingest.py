@@ -0,0 +1,431 @@
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config import config
+from src.storage.file_index import WorkspaceFileIndex, get_file_index
+
+# Directories that hold dependencies, build output or caches rather than project code
+VENDORED_DIRS = {
+    ".git", "node_modules", "bower_components", "vendor", "third_party", "site-packages",
+    ".venv", "venv", "env", "__pycache__", ".tox", ".nox", ".mypy_cache", ".pytest_cache",
+    ".ruff_cache", "dist", "build", "target", ".next", ".gradle", ".idea", ".vscode",
+}
+SKIPPED_FILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum",
+}
+
+LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".go": "go", ".rs": "rust", ".java": "java",
+    ".kt": "kotlin", ".scala": "scala", ".cs": "csharp", ".rb": "ruby", ".php": "php",
+    ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp", ".swift": "swift",
+    ".md": "markdown", ".rst": "text", ".txt": "text", ".sh": "shell", ".sql": "sql",
+    ".html": "html", ".css": "css", ".scss": "css", ".json": "json", ".yaml": "yaml",
+    ".yml": "yaml", ".toml": "toml", ".ini": "text", ".cfg": "text",
+}
+FILENAMES = {"Dockerfile": "docker", "Makefile": "make"}
+
+_JVM_MODIFIERS = r"(?:(?:public|private|protected|internal|static|final|abstract|sealed|open|override|virtual|async|synchronized|data)\s+)"
+
+# Lines that start a top-level definition; the first group is its name
+BOUNDARIES = {
+    "javascript": [
+        r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?function\*?\s*([\w$]*)",
+        r"^(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([\w$]+)",
+        r"^(?:export\s+)?(?:const|let|var)\s+([\w$]+)\s*=\s*(?:async\s+)?(?:function|\(|[\w$]+\s*=>)",
+        r"^(?:export\s+)?(?:declare\s+)?(?:interface|type|enum)\s+([\w$]+)",
+    ],
+    "go": [r"^func\s+(?:\([^)]*\)\s*)?(\w+)", r"^type\s+(\w+)"],
+    "rust": [
+        r"^(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?(?:const\s+)?fn\s+(\w+)",
+        r"^(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|mod)\s+(\w+)",
+        r"^impl(?:<[^>]*>)?\s+([\w:]+(?:\s+for\s+[\w:]+)?)",
+    ],
+    "java": [
+        rf"^\s{{0,4}}{_JVM_MODIFIERS}*(?:class|interface|enum|record|object)\s+(\w+)",
+        rf"^\s{{4}}{_JVM_MODIFIERS}+[\w<>\[\],.? ]+\s+(\w+)\s*\(",
+        r"^\s{0,4}(?:(?:private|public|internal|override|suspend)\s+)*fun\s+(?:<[^>]*>\s*)?([\w.]+)",
+        r"^\s{0,4}def\s+(\w+)",
+    ],
+    "ruby": [r"^\s{0,2}(?:def|class|module)\s+([\w:.?!]+)"],
+    "php": [r"^\s{0,4}(?:(?:public|private|protected|static|abstract|final)\s+)*(?:function|class|interface|trait)\s+(\w+)"],
+    "c": [r"^(?:class|struct|namespace|enum)\s+(\w+)", r"^[A-Za-z_][\w\s\*&:<>,]*?\b([~\w]+)\s*\([^;]*$"],
+    "swift": [r"^\s{0,4}(?:(?:public|private|internal|open|static|final)\s+)*(?:func|class|struct|enum|protocol|extension)\s+(\w+)"],
+    "markdown": [r"^#{1,3}\s+(.+)"],
+}
+BOUNDARIES["typescript"] = BOUNDARIES["javascript"]
+for _language in ("kotlin", "scala", "csharp"):
+    BOUNDARIES[_language] = BOUNDARIES["java"]
+BOUNDARIES["cpp"] = BOUNDARIES["c"]
+BOUNDARY_PATTERNS = {
+    language: [re.compile(pattern) for pattern in patterns]
+    for language, patterns in BOUNDARIES.items()
+}
+
+# A chunk is (symbol, first line, last line, text), lines 1-based and inclusive
+Chunk = Tuple[str, int, int, str]
+
+def language_for(rel_path: str) -> Optional[str]:
+    name = os.path.basename(rel_path)
+    if name in FILENAMES:
+        return FILENAMES[name]
+    return LANGUAGES.get(os.path.splitext(name)[1].lower())
+
+def should_ingest(rel_path: str, size: int, max_bytes: int) -> bool:
+    """Skip vendored directories, lockfiles, minified bundles, unknown types and huge files"""
+    parts = rel_path.split(os.sep)
+    name = parts[-1]
+    if any(part in VENDORED_DIRS for part in parts[:-1]):
+        return False
+    if name in SKIPPED_FILES or ".min." in name:
+        return False
+    return 0 < size <= max_bytes and language_for(rel_path) is not None
+
+def is_binary(data: bytes) -> bool:
+    """NUL bytes in the first 8 KB, or content that isn't UTF-8"""
+    if b"\0" in data[:8192]:
+        return True
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return True
+    return False
+
+def _windows(symbol: str, lines: List[str], first_line: int, max_lines: int) -> List[Chunk]:
+    """Split a span of lines into chunks of at most max_lines, dropping blank ones"""
+    while lines and not lines[0].strip():
+        lines = lines[1:]
+        first_line += 1
+    while lines and not lines[-1].strip():
+        lines = lines[:-1]
+    chunks = []
+    for start in range(0, len(lines), max_lines):
+        window = lines[start:start + max_lines]
+        if any(line.strip() for line in window):
+            part = symbol if len(lines) <= max_lines else f"{symbol}[{start // max_lines + 1}]"
+            chunks.append((part, first_line + start, first_line + start + len(window) - 1, "\n".join(window)))
+    return chunks
+
+def chunk_python(source: str, max_lines: int) -> List[Chunk]:
+    """One chunk per top-level function and class, with the remaining module-level
+    code chunked separately. Large classes are split into their header, each
+    method, and the class-body statements between or after the methods.
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines()
+    chunks = []
+    module_lines: List[Tuple[int, str]] = []
+    position = 1
+
+    def definition_span(node):
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+        return start, node.end_lineno
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start, end = definition_span(node)
+        module_lines.extend((n, lines[n - 1]) for n in range(position, start))
+        position = end + 1
+
+        methods = [
+            child for child in node.body
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ] if isinstance(node, ast.ClassDef) else []
+        if end - start + 1 <= max_lines or not methods:
+            chunks.extend(_windows(node.name, lines[start - 1:end], start, max_lines))
+            continue
+
+        # Class header and attributes, then each method on its own
+        header_end = definition_span(methods[0])[0] - 1
+        chunks.extend(_windows(node.name, lines[start - 1:header_end], start, max_lines))
+        covered = set()
+        for method in methods:
+            method_start, method_end = definition_span(method)
+            covered.update(range(method_start, method_end + 1))
+            chunks.extend(_windows(
+                f"{node.name}.{method.name}", lines[method_start - 1:method_end], method_start, max_lines
+            ))
+        # Class attributes, nested classes and other statements between or after the methods
+        chunks.extend(_runs(node.name, [
+            (n, lines[n - 1]) for n in range(header_end + 1, end + 1) if n not in covered
+        ], max_lines))
+
+    module_lines.extend((n, lines[n - 1]) for n in range(position, len(lines) + 1))
+    # Module-level code between definitions
+    chunks.extend(_runs("<module>", module_lines, max_lines))
+    return sorted(chunks, key=lambda chunk: chunk[1])
+
+def _runs(symbol: str, numbered_lines: List[Tuple[int, str]], max_lines: int) -> List[Chunk]:
+    """Chunk (line number, line) pairs in runs of consecutive line numbers"""
+    chunks = []
+    run: List[Tuple[int, str]] = []
+    for number, line in numbered_lines + [(None, None)]:
+        if run and (number is None or number != run[-1][0] + 1):
+            chunks.extend(_windows(symbol, [text for _, text in run], run[0][0], max_lines))
+            run = []
+        if number is not None:
+            run.append((number, line))
+    return chunks
+
+def chunk_by_boundaries(source: str, patterns: List[re.Pattern], max_lines: int) -> List[Chunk]:
+    """Split at lines that start a definition; text before the first is "<module>" """
+    lines = source.splitlines()
+    starts = []
+    for number, line in enumerate(lines, 1):
+        for pattern in patterns:
+            match = pattern.match(line)
+            if match:
+                starts.append((number, (match.group(1) or "<anonymous>").strip()))
+                break
+
+    spans = []
+    if not starts or starts[0][0] > 1:
+        spans.append(("<module>", 1, (starts[0][0] - 1) if starts else len(lines)))
+    for index, (number, symbol) in enumerate(starts):
+        end = starts[index + 1][0] - 1 if index + 1 < len(starts) else len(lines)
+        spans.append((symbol, number, end))
+
+    chunks = []
+    for symbol, start, end in spans:
+        chunks.extend(_windows(symbol, lines[start - 1:end], start, max_lines))
+    return chunks
+
+def chunk_source(rel_path: str, source: str, max_lines: int = 120) -> List[Chunk]:
+    """Chunk a source file along language-aware boundaries"""
+    language = language_for(rel_path)
+    if language == "python":
+        try:
+            return chunk_python(source, max_lines)
+        except (SyntaxError, ValueError):
+            pass
+    patterns = BOUNDARY_PATTERNS.get(language)
+    if patterns:
+        return chunk_by_boundaries(source, patterns, max_lines)
+    return _windows("<file>", source.splitlines(), 1, max_lines)
+
+class CodeManifest:
+    """Per-file size, mtime, content hash and chunk IDs of an ingested workspace"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, modified REAL, sha256 TEXT, chunk_ids TEXT)"
+        )
+
+    def all(self) -> Dict[str, Tuple[int, float, str, List[str]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, modified, sha256, chunk_ids FROM files").fetchall()
+        return {path: (size, modified, sha256, json.loads(chunk_ids)) for path, size, modified, sha256, chunk_ids in rows}
+
+    def update(self, records: Iterable[Tuple[str, int, float, str, List[str]]], removed: Iterable[str]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, modified, sha256, chunk_ids) VALUES (?, ?, ?, ?, ?)",
+                [(path, size, modified, sha256, json.dumps(chunk_ids)) for path, size, modified, sha256, chunk_ids in records]
+            )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            self._conn.execute("COMMIT")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+
+class CodeIngestor:
+    """Streams a workspace's source files into the context vector store.
+
+    Candidate files come from the workspace's file index, minus binaries,
+    vendored directories and unknown file types. Files whose size and mtime
+    match the manifest are skipped without being read; the rest are read,
+    hashed and, if their content changed, chunked on a worker pool. Chunks are
+    fed to add_contexts_bulk as they are produced, so embedding runs in
+    batches and unchanged chunks are skipped by content hash. Chunks of edited
+    or deleted files that no longer exist are removed from the store.
+    """
+
+    def __init__(self, vector_store, workspace: str, index: WorkspaceFileIndex,
+                 manifest: Optional[CodeManifest] = None, max_workers: Optional[int] = None,
+                 max_file_bytes: Optional[int] = None, max_chunk_lines: Optional[int] = None):
+        self.vector_store = vector_store
+        self.workspace = workspace
+        self.index = index
+        self.manifest = manifest or CodeManifest(index.db_path.with_name(f"{index.db_path.stem}-code.sqlite3"))
+        self.max_workers = max_workers or config.INGEST["max_workers"]
+        self.max_file_bytes = max_file_bytes or config.INGEST["code_max_file_bytes"]
+        self.max_chunk_lines = max_chunk_lines or config.INGEST["code_max_chunk_lines"]
+        self._ingest_lock = asyncio.Lock()
+        self._following = False
+
+    def _doc_id(self, rel_path: str, symbol: str, occurrence: int) -> str:
+        suffix = f"~{occurrence}" if occurrence else ""
+        return f"code:{self.workspace}:{rel_path}#{symbol}{suffix}"
+
+    def _process(self, file: Dict, previous: Optional[Tuple]) -> Optional[Dict]:
+        """Read, hash and chunk one file; runs on the worker pool"""
+        try:
+            with open(file["full_path"], "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if is_binary(data):
+            return {"file": file, "sha256": None, "items": [], "chunk_ids": []}
+        digest = hashlib.sha256(data).hexdigest()
+        if previous is not None and previous[2] == digest:
+            # Touched but unchanged: keep the chunks, remember the new mtime
+            return {"file": file, "sha256": digest, "items": None, "chunk_ids": previous[3]}
+
+        rel_path = file["path"]
+        language = language_for(rel_path)
+        items, chunk_ids, seen = [], [], {}
+        for symbol, start, end, text in chunk_source(rel_path, data.decode("utf-8"), self.max_chunk_lines):
+            occurrence = seen.get(symbol, 0)
+            seen[symbol] = occurrence + 1
+            doc_id = self._doc_id(rel_path, symbol, occurrence)
+            chunk_ids.append(doc_id)
+            # The header carries no line numbers, so code that only moved keeps its embedding cache entry
+            items.append((f"{rel_path} {symbol}\n\n{text}", {
+                "type": "code",
+                "workspace": self.workspace,
+                "path": rel_path,
+                "language": language,
+                "symbol": symbol,
+                "start_line": start,
+                "end_line": end,
+            }, doc_id))
+        return {"file": file, "sha256": digest, "items": items, "chunk_ids": chunk_ids}
+
+    def _plan(self, paths: Optional[Iterable[str]] = None):
+        """Files to process and manifest entries to drop, optionally limited to some paths"""
+        manifest = self.manifest.all()
+        if paths is None:
+            files = self.index.files()
+            candidates = {f["path"]: f for f in files if should_ingest(f["path"], f["size"], self.max_file_bytes)}
+            removed = [path for path in manifest if path not in candidates]
+        else:
+            candidates, removed = {}, []
+            for path in paths:
+                file = self.index.get(path)
+                if file is not None and should_ingest(path, file["size"], self.max_file_bytes):
+                    candidates[path] = file
+                elif path in manifest:
+                    removed.append(path)
+
+        changed = [
+            (file, manifest.get(path)) for path, file in candidates.items()
+            if path not in manifest or manifest[path][:2] != (file["size"], file["modified"])
+        ]
+        return changed, removed, manifest, len(candidates)
+
+    async def ingest(self, paths: Optional[Iterable[str]] = None, progress=None) -> Dict[str, int]:
+        """Ingest the whole workspace, or just the given paths, and return counts.
+        progress, if given, is called as progress(files_done, files_total).
+        """
+        async with self._ingest_lock:
+            changed, removed, manifest, total = await asyncio.to_thread(self._plan, paths)
+            stats = {
+                "files": total,
+                "unchanged_files": total - len(changed),
+                "ingested_files": 0,
+                "removed_files": len(removed),
+                "chunks_added": 0,
+                "chunks_unchanged": 0,
+                "chunks_deleted": 0,
+            }
+            records = []
+            stale_ids = [doc_id for path in removed for doc_id in manifest[path][3]]
+
+            def chunk_items():
+                """Yield chunks as the worker pool finishes files, recording manifest updates"""
+                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="code-ingest") as pool:
+                    results = pool.map(lambda job: self._process(*job), changed)
+                    for done, result in enumerate(results, 1):
+                        if progress:
+                            progress(done, len(changed))
+                        if result is None:
+                            continue
+                        file = result["file"]
+                        previous = manifest.get(file["path"])
+                        records.append((file["path"], file["size"], file["modified"], result["sha256"], result["chunk_ids"]))
+                        if result["items"] is None:
+                            continue
+                        if previous is not None:
+                            kept = set(result["chunk_ids"])
+                            stale_ids.extend(doc_id for doc_id in previous[3] if doc_id not in kept)
+                        if result["items"]:
+                            stats["ingested_files"] += 1
+                            yield from result["items"]
+
+            if changed:
+                written = await self.vector_store.add_contexts_bulk(chunk_items())
+                stats["chunks_added"] = written["added"]
+                stats["chunks_unchanged"] = written["skipped"]
+            if stale_ids:
+                await self.vector_store.delete_documents(stale_ids)
+                stats["chunks_deleted"] = len(stale_ids)
+            await asyncio.to_thread(self.manifest.update, records, removed)
+            return stats
+
+    def follow(self, watcher):
+        """Re-ingest files as the workspace watcher reports them changed"""
+        if self._following:
+            return
+        self._following = True
+
+        def on_change(changes):
+            from src.core.async_runtime import get_background_loop
+            paths = {path for kind in ("added", "modified", "removed") for path in changes[kind]}
+            stats = get_background_loop().run(self.ingest(paths))
+            if stats["ingested_files"] or stats["removed_files"]:
+                print(f"Re-ingested {self.workspace}: {stats}")
+
+        watcher.add_listener(on_change)
+
+_ingestors: Dict[str, CodeIngestor] = {}
+_ingestors_lock = threading.Lock()
+
+def get_code_ingestor(vector_store, workspace: str, index: WorkspaceFileIndex) -> CodeIngestor:
+    """Get the process-wide ingestor for a workspace directory"""
+    with _ingestors_lock:
+        if index.root not in _ingestors:
+            _ingestors[index.root] = CodeIngestor(vector_store, workspace, index)
+        return _ingestors[index.root]
+
+def main():
+    """Ingest a workspace's source files into the context vector store"""
+    from src.storage.vector_store import ContextVectorStore
+
+    parser = argparse.ArgumentParser(description="Index a workspace's code for Context Search")
+    parser.add_argument("path", help="workspace directory")
+    parser.add_argument("--name", help="workspace name (defaults to the directory name)")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.path)
+    index = get_file_index(root)
+    # Nothing watches the workspace here, so rescan every directory to catch in-place edits
+    index.refresh(full=True)
+    ingestor = CodeIngestor(ContextVectorStore(), args.name or os.path.basename(root), index)
+
+    def report(done, total):
+        if done == total or done % 500 == 0:
+            print(f"Processed {done}/{total} changed files")
+
+    print(asyncio.run(ingestor.ingest(progress=report)))
+
+if __name__ == "__main__":
+    main()
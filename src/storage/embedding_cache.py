@@ -0,0 +1,61 @@
+import hashlib
+from array import array
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+from src.storage.sqlite_cache import SQLiteCache
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only runs the model for texts it hasn't embedded before.
+    Vectors are keyed by model name and text hash and stored as float32 blobs.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: SQLiteCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only the ones missing from the cache"""
+        keys = [self._key("document", text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once, in a single model call
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            packed = [(key, self._pack(vector)) for key, vector in zip(missing, vectors)]
+            self.cache.set_many(packed)
+            cached.update(packed)
+
+        return [self._unpack(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query, reusing the vector from an earlier identical query"""
+        key = self._key("query", text)
+        blob = self.cache.get(key)
+        if blob is None:
+            # Round-trip through float32 so hits and misses return identical vectors
+            blob = self._pack(self.embeddings.embed_query(text))
+            self.cache.set(key, blob)
+        return self._unpack(blob)
+
+    def stats(self) -> Dict:
+        """Cache hit/miss counters; every hit is one model inference saved"""
+        return self.cache.stats()
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from src.config import config
+
+SKIP_DIRS = {".git"}
+
+class WorkspaceFileIndex:
+    """Persistent index of the files in a workspace, kept in SQLite.
+
+    refresh() brings it up to date incrementally. Every known directory is
+    stat'ed, but only directories whose mtime changed (so entries were added,
+    removed or renamed in them) are listed again with os.scandir, reusing each
+    entry's stat result. A full refresh also re-lists unchanged directories to
+    catch files modified in place. Queries read the index and never walk the
+    workspace.
+    """
+
+    def __init__(self, root: str, db_path=None):
+        self.root = os.path.abspath(root)
+        if db_path is None:
+            digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+            db_path = config.PATHS["file_index"] / f"{Path(self.root).name}-{digest}.sqlite3"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, dir TEXT NOT NULL, size INTEGER, mtime_ns INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_dir ON files(dir)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            "path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+
+    def _full_path(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path) if rel_path else self.root
+
+    def refresh(self, full: bool = False) -> Dict[str, List[str]]:
+        """Update the index from disk and return the added, modified and removed paths"""
+        changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            # Take the write lock before reading, so concurrent refreshes from other
+            # processes wait instead of failing to upgrade a read transaction
+            self._conn.execute("BEGIN IMMEDIATE")
+            known_dirs = {}
+            children = defaultdict(list)
+            try:
+                for path, parent, mtime_ns in self._conn.execute("SELECT path, parent, mtime_ns FROM dirs"):
+                    known_dirs[path] = mtime_ns
+                    if parent is not None:
+                        children[parent].append(path)
+
+                seen_dirs = set()
+                stack = [""]
+                while stack:
+                    rel_dir = stack.pop()
+                    try:
+                        mtime_ns = os.stat(self._full_path(rel_dir)).st_mtime_ns
+                    except OSError:
+                        continue
+                    seen_dirs.add(rel_dir)
+                    if not full and known_dirs.get(rel_dir) == mtime_ns:
+                        stack.extend(children[rel_dir])
+                        continue
+                    stack.extend(self._scan_dir(rel_dir, mtime_ns, changes))
+
+                for rel_dir in set(known_dirs) - seen_dirs:
+                    changes["removed"].extend(
+                        path for (path,) in self._conn.execute("SELECT path FROM files WHERE dir = ?", (rel_dir,))
+                    )
+                    self._conn.execute("DELETE FROM files WHERE dir = ?", (rel_dir,))
+                    self._conn.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+                self._bump_generation(changes)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changes
+
+    def _scan_dir(self, rel_dir: str, mtime_ns: int, changes: Dict[str, List[str]]) -> List[str]:
+        """List one directory, record its file changes and return its subdirectories"""
+        known = {
+            path: (size, file_mtime_ns)
+            for path, size, file_mtime_ns in self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (rel_dir,)
+            )
+        }
+        subdirs = []
+        rows = []
+        try:
+            with os.scandir(self._full_path(rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                subdirs.append(rel_path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        # Broken symlinks and files removed while listing
+                        continue
+                    previous = known.pop(rel_path, None)
+                    if previous is None:
+                        changes["added"].append(rel_path)
+                    elif previous != (stat.st_size, stat.st_mtime_ns):
+                        changes["modified"].append(rel_path)
+                    else:
+                        continue
+                    rows.append((rel_path, rel_dir, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            return []
+
+        if rows:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns) VALUES (?, ?, ?, ?)", rows
+            )
+        if known:
+            changes["removed"].extend(known)
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in known])
+        parent = os.path.dirname(rel_dir) if rel_dir else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)", (rel_dir, parent, mtime_ns)
+        )
+        return subdirs
+
+    def update_paths(self, rel_paths: Iterable[str]) -> Dict[str, List[str]]:
+        """Re-stat specific files, e.g. after writing them, without a refresh"""
+        changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for rel_path in rel_paths:
+                    row = self._conn.execute(
+                        "SELECT size, mtime_ns FROM files WHERE path = ?", (rel_path,)
+                    ).fetchone()
+                    try:
+                        stat = os.stat(self._full_path(rel_path))
+                        is_file = os.path.isfile(self._full_path(rel_path))
+                    except OSError:
+                        is_file = False
+                    if not is_file:
+                        if row is not None:
+                            changes["removed"].append(rel_path)
+                            self._conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+                        continue
+                    if row is None:
+                        changes["added"].append(rel_path)
+                    elif tuple(row) != (stat.st_size, stat.st_mtime_ns):
+                        changes["modified"].append(rel_path)
+                    else:
+                        continue
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                        (rel_path, os.path.dirname(rel_path), stat.st_size, stat.st_mtime_ns)
+                    )
+                self._bump_generation(changes)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changes
+
+    def _bump_generation(self, changes: Dict[str, List[str]]):
+        if any(changes.values()):
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+    def generation(self) -> int:
+        """A counter that changes whenever files are added, modified or removed,
+        including by other processes or watchers sharing the index
+        """
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def _file_dict(self, path: str, size: int, mtime_ns: int) -> Dict:
+        return {
+            "name": os.path.basename(path),
+            "path": path,
+            "full_path": self._full_path(path),
+            "size": size,
+            "modified": mtime_ns / 1e9,
+        }
+
+    def files(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Indexed files ordered by path, in the shape CodebaseManager returns"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files ORDER BY path LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return [self._file_dict(*row) for row in rows]
+
+    def get(self, rel_path: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE path = ?", (rel_path,)
+            ).fetchone()
+        return self._file_dict(*row) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_file_indexes: Dict[str, WorkspaceFileIndex] = {}
+_file_indexes_lock = threading.Lock()
+
+def get_file_index(root: str) -> WorkspaceFileIndex:
+    """Get the process-wide index of a workspace directory, shared by the
+    workspace manager and watcher so all writes go through one connection
+    """
+    root = os.path.abspath(root)
+    with _file_indexes_lock:
+        if root not in _file_indexes:
+            _file_indexes[root] = WorkspaceFileIndex(root)
+        return _file_indexes[root]
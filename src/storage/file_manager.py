@@ -1,7 +1,10 @@
 import os
+import time
 import git
 from pathlib import Path
 from typing import List, Dict, Optional
+from src.config import config
+from src.storage.file_index import WorkspaceFileIndex, get_file_index
 
 class CodebaseManager:
     """Manages access to local codebases with future remote hosting in mind"""
@@ -10,61 +13,112 @@ class CodebaseManager:
         """Initialize with a workspace directory"""
         self.workspace_dir = workspace_dir or os.path.expanduser("~/ai-context-workspaces")
         os.makedirs(self.workspace_dir, exist_ok=True)
+        self._indexes: Dict[str, WorkspaceFileIndex] = {}
+        self._last_refresh: Dict[str, float] = {}
+        self._search_indexes: Dict[str, tuple] = {}
         
     def list_workspaces(self) -> List[Dict]:
-        """List available workspaces (Git repositories)"""
+        """List available workspaces (Git repositories) without blocking on git.
+        The branch is read from HEAD; "modified" is None until the background
+        status check for that workspace has finished.
+        """
+        from src.storage.workspace_status import get_workspace_status, read_branch
+        
+        status = get_workspace_status()
         workspaces = []
-        for item in os.listdir(self.workspace_dir):
-            path = os.path.join(self.workspace_dir, item)
-            if os.path.isdir(path) and os.path.exists(os.path.join(path, ".git")):
-                # It's a git repository
-                try:
-                    repo = git.Repo(path)
-                    workspaces.append({
-                        "name": item,
-                        "path": path,
-                        "active_branch": repo.active_branch.name,
-                        "modified": len(repo.index.diff(None)) > 0
-                    })
-                except git.InvalidGitRepositoryError:
+        with os.scandir(self.workspace_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if not entry.is_dir() or not os.path.exists(os.path.join(entry.path, ".git")):
+                    continue
+                branch = read_branch(entry.path)
+                if branch is None:
                     # Not a valid git repo
-                    pass
+                    continue
+                modified = status.get(entry.path)
+                workspaces.append({
+                    "name": entry.name,
+                    "path": entry.path,
+                    "active_branch": branch,
+                    "modified": modified,
+                    "status": "unknown" if modified is None else ("modified" if modified else "clean")
+                })
         return workspaces
     
-    def open_workspace(self, name: str) -> Dict:
-        """Open a specific workspace"""
+    def open_workspace(self, name: str, refresh: Optional[bool] = None, include_files: bool = True) -> Dict:
+        """Open a specific workspace. Files come from its persistent index, which a
+        background watcher keeps current, or which is otherwise refreshed incrementally
+        at most once per refresh interval unless refresh is given. Callers that page
+        through search_files can skip listing every file with include_files=False.
+        """
         path = os.path.join(self.workspace_dir, name)
         if not os.path.exists(path):
             raise ValueError(f"Workspace {name} does not exist")
         
-        return {
+        index = self.file_index(name)
+        watcher = self.watch_workspace(name) if config.WORKSPACE["watch"] else None
+        if refresh is None:
+            if watcher is not None:
+                # The watcher does the first refresh itself and keeps the index current;
+                # refresh here only if that didn't happen in time
+                refresh = (
+                    name not in self._last_refresh
+                    and not watcher.wait_ready(config.WORKSPACE["watch_ready_timeout"])
+                )
+            elif name not in self._last_refresh:
+                refresh = True
+            else:
+                refresh = time.monotonic() - self._last_refresh[name] >= config.WORKSPACE["refresh_interval"]
+        if refresh:
+            self.refresh_workspace(name)
+        
+        workspace = {
             "name": name,
-            "files": self._list_files(path),
             "path": path
         }
+        if include_files:
+            workspace["files"] = index.files()
+        return workspace
     
-    def _list_files(self, directory: str) -> List[Dict]:
-        """List files in a directory with metadata"""
-        files = []
-        for root, dirs, filenames in os.walk(directory):
-            # Skip .git directory
-            if ".git" in dirs:
-                dirs.remove(".git")
-            
-            rel_path = os.path.relpath(root, directory)
-            if rel_path == ".":
-                rel_path = ""
-                
-            for filename in filenames:
-                full_path = os.path.join(root, filename)
-                files.append({
-                    "name": filename,
-                    "path": os.path.join(rel_path, filename) if rel_path else filename,
-                    "full_path": full_path,
-                    "size": os.path.getsize(full_path),
-                    "modified": os.path.getmtime(full_path)
-                })
-        return files
+    def search_files(self, name: str, query: str, limit: int = 100, offset: int = 0):
+        """Ranked substring/fuzzy search over a workspace's paths.
+        Returns the total number of matches and one page of files.
+        """
+        from src.storage.path_search import PathSearchIndex
+        
+        index = self.file_index(name)
+        generation = index.generation()
+        cached = self._search_indexes.get(name)
+        if cached is None or cached[0] != generation:
+            cached = (generation, PathSearchIndex(index.files()))
+            self._search_indexes[name] = cached
+        return cached[1].page(query, limit, offset)
+    
+    def file_index(self, name: str) -> WorkspaceFileIndex:
+        """The persistent file index of a workspace"""
+        if name not in self._indexes:
+            self._indexes[name] = get_file_index(os.path.join(self.workspace_dir, name))
+        return self._indexes[name]
+    
+    def watch_workspace(self, name: str):
+        """Start (or get) the background watcher that keeps a workspace's index current"""
+        from src.storage.workspace_watcher import get_workspace_watcher
+        return get_workspace_watcher(os.path.join(self.workspace_dir, name))
+    
+    def code_ingestor(self, name: str, vector_store):
+        """The pipeline feeding a workspace's code into the context store; while the
+        workspace is watched, changed files are re-ingested as they are saved
+        """
+        from src.storage.code_ingest import get_code_ingestor
+        ingestor = get_code_ingestor(vector_store, name, self.file_index(name))
+        if config.WORKSPACE["watch"]:
+            ingestor.follow(self.watch_workspace(name))
+        return ingestor
+    
+    def refresh_workspace(self, name: str, full: bool = False) -> Dict[str, List[str]]:
+        """Bring a workspace's file index up to date and return what changed"""
+        changes = self.file_index(name).refresh(full=full)
+        self._last_refresh[name] = time.monotonic()
+        return changes
     
     def read_file(self, workspace: str, file_path: str) -> str:
         """Read contents of a file in a workspace"""
@@ -87,6 +141,7 @@ class CodebaseManager:
         with open(full_path, 'w', encoding='utf-8') as f:
             f.write(content)
         
+        self.file_index(workspace).update_paths([os.path.normpath(file_path)])
         return True
     
     def clone_repository(self, git_url: str, workspace_name: Optional[str] = None) -> Dict:
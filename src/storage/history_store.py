@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.config import config
+
+class ProjectHistoryStore:
+    """SQLite-backed project history.
+
+    Projects are single-row inserts indexed by id and created_at, so adding a
+    project, loading one by ID or reading a page of recent projects stays fast
+    however long the history grows. Entries from the old project_history.json
+    are imported once on first use.
+    """
+
+    COLUMNS = ("id", "name", "plan_path", "brief", "created_at")
+
+    def __init__(self, db_path=None, legacy_json=None):
+        self.db_path = Path(db_path or config.PATHS["data"] / "project_history.db")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS projects ("
+            "id TEXT PRIMARY KEY, name TEXT NOT NULL, plan_path TEXT, "
+            "brief TEXT, created_at TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS projects_created_at ON projects(created_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        legacy_json = legacy_json or config.PATHS["data"] / "project_history.json"
+        self._import_legacy_json(Path(legacy_json))
+
+    def _import_legacy_json(self, path: Path):
+        """Import project_history.json the first time the store is opened"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone():
+                return
+            projects = []
+            if path.exists():
+                try:
+                    with open(path, "r") as f:
+                        projects = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Could not import project history from {path}: {str(e)}")
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO projects (id, name, plan_path, brief, created_at) VALUES (?, ?, ?, ?, ?)",
+                [tuple(project.get(column, "") for column in self.COLUMNS) for project in projects],
+            )
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_json_imported', ?)", (str(path),))
+            self._conn.execute("COMMIT")
+
+    def add(self, name: str, plan_path: str, brief: str, created_at: Optional[str] = None,
+            project_id: Optional[str] = None) -> str:
+        """Insert a project and return its ID"""
+        project_id = project_id or str(uuid.uuid4())
+        created_at = created_at or datetime.now().strftime("%Y%m%d-%H%M%S")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO projects (id, name, plan_path, brief, created_at) VALUES (?, ?, ?, ?, ?)",
+                (project_id, name, plan_path, brief, created_at),
+            )
+        return project_id
+
+    def get(self, project_id: str) -> Optional[Dict]:
+        """Get a project by ID, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_plan_path(self, project_id: str, plan_path: str):
+        with self._lock:
+            self._conn.execute("UPDATE projects SET plan_path = ? WHERE id = ?", (plan_path, project_id))
+
+    def recent(self, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """A page of projects, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM projects ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def clear(self):
+        """Delete every project"""
+        with self._lock:
+            self._conn.execute("DELETE FROM projects")
@@ -0,0 +1,88 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+def fuzzy_matcher(query: str) -> Callable[[str], Optional[re.Match]]:
+    """A search function matching query as a subsequence, e.g. "fmgr" in "file_manager.py".
+    Each gap is a negated character class, so matching never backtracks.
+    """
+    pattern = re.escape(query[0])
+    for char in query[1:]:
+        escaped = re.escape(char)
+        pattern += f"[^{escaped}]*{escaped}"
+    return re.compile(pattern).search
+
+def fuzzy_in_name(query: str) -> Callable[[str], Optional[re.Match]]:
+    """Like fuzzy_matcher, but the whole subsequence must fall in the file name"""
+    pattern = re.escape(query[0])
+    for char in query[1:]:
+        escaped = re.escape(char)
+        pattern += f"[^{escaped}/]*{escaped}"
+    return re.compile(pattern + "[^/]*$").search
+
+class PathSearchIndex:
+    """Ranked substring and fuzzy search over a workspace's file paths.
+
+    Paths are lowercased once and kept sorted by length, then path, so every
+    scan already returns its matches in ranking order. Results are ranked by
+    tier, as in an editor's "go to file": file name starting with the query,
+    file name containing it, path containing it, fuzzy match within the file
+    name, then fuzzy match anywhere in the path. Ranked results are cached per
+    query, so paging through them or rerunning doesn't search again.
+    """
+
+    def __init__(self, files: List[Dict], cache_size: int = 16):
+        self.files = sorted(files, key=lambda f: (len(f["path"]), f["path"]))
+        self.paths = [f["path"].lower() for f in self.files]
+        self.names = [os.path.basename(path) for path in self.paths]
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return "".join(query.lower().split())
+
+    def search(self, query: str) -> List[int]:
+        """Indexes into self.files of every match, best first"""
+        query = self.normalize(query)
+        if not query:
+            return list(range(len(self.files)))
+        if query in self._cache:
+            self._cache.move_to_end(query)
+            return self._cache[query]
+
+        paths, names = self.paths, self.names
+        substring = [i for i, path in enumerate(paths) if query in path]
+        in_name = [i for i in substring if query in names[i]]
+        name_prefix = [i for i in in_name if names[i].startswith(query)]
+        ranked = name_prefix
+        ranked += [i for i in in_name if not names[i].startswith(query)]
+        if len(in_name) < len(substring):
+            in_name_set = set(in_name)
+            ranked += [i for i in substring if i not in in_name_set]
+
+        if len(query) > 1:
+            # Fuzzy matches that aren't substring matches
+            matched = set(substring)
+            fuzzy = fuzzy_matcher(query)
+            fuzzy_ids = [i for i, path in enumerate(paths) if fuzzy(path) and i not in matched]
+            if fuzzy_ids:
+                fuzzy_name = fuzzy_in_name(query)
+                in_name = [i for i in fuzzy_ids if fuzzy_name(paths[i])]
+                in_name_set = set(in_name)
+                ranked += in_name
+                ranked += [i for i in fuzzy_ids if i not in in_name_set]
+
+        self._cache[query] = ranked
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return ranked
+
+    def page(self, query: str, limit: int = 100, offset: int = 0) -> Tuple[int, List[Dict]]:
+        """Total number of matches and the files for one page of them"""
+        ranked = self.search(query)
+        return len(ranked), [self.files[i] for i in ranked[offset:offset + limit]]
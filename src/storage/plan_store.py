@@ -0,0 +1,242 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from filelock import FileLock
+from src.config import config
+
+class PlanVersionConflict(RuntimeError):
+    """Raised when a plan was changed by someone else since it was read."""
+
+def atomic_write(path, content: str):
+    """Write content to a temp file in the same directory and rename it over path,
+    so readers see either the old file or the new one, never a truncated one.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+class PlanFileStore:
+    """Atomic, locked and versioned plan file writes.
+
+    Every write holds a FileLock on `<plan>.lock`, goes through atomic_write and
+    bumps the version counter kept in `<plan>.version`. Callers pass the version
+    they read as expected_version and get PlanVersionConflict if the file has
+    moved on since. write_debounced() holds a write back for `debounce` seconds
+    and coalesces any further edits to the same plan into that one write. Every
+    edit still gets its own version, and the coalesced write records the last.
+    """
+
+    def __init__(self, debounce: float = 0.5, lock_timeout: float = 10.0):
+        self.debounce = debounce
+        self.lock_timeout = lock_timeout
+        self.errors: Dict[str, str] = {}
+        # path -> (content, version the pending write expects on disk, version it will write)
+        self._pending: Dict[str, Tuple[str, Optional[int], int]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def _file_lock(self, path: str) -> FileLock:
+        return FileLock(f"{path}.lock", timeout=self.lock_timeout)
+
+    @staticmethod
+    def _read_version(path: str) -> int:
+        try:
+            with open(f"{path}.version", "r") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def version(self, path) -> int:
+        """The version of the plan on disk, or of its pending write"""
+        path = str(path)
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path][2]
+        return self._read_version(path)
+
+    def read(self, path) -> Tuple[str, int]:
+        """Return the plan's content and version"""
+        path = str(path)
+        with self._file_lock(path):
+            with open(path, "r") as f:
+                return f.read(), self._read_version(path)
+
+    def write(self, path, content: str, expected_version: Optional[int] = None,
+              new_version: Optional[int] = None) -> int:
+        """Write the plan now and return its new version, which is new_version
+        if given and ahead of the current one
+        """
+        path = str(path)
+        with self._file_lock(path):
+            current = self._read_version(path)
+            if expected_version is not None and expected_version != current:
+                raise PlanVersionConflict(
+                    f"{path} is at version {current}, expected {expected_version}"
+                )
+            version = max(current + 1, new_version or 0)
+            atomic_write(path, content)
+            atomic_write(f"{path}.version", str(version))
+        self.errors.pop(path, None)
+        return version
+
+    def write_debounced(self, path, content: str, expected_version: Optional[int] = None) -> int:
+        """Schedule a write and return the version the plan will have once it lands"""
+        path = str(path)
+        with self._lock:
+            pending = self._pending.get(path)
+            # Edits made on top of a pending write see the version it will produce
+            current = pending[2] if pending else self._read_version(path)
+            if expected_version is not None and expected_version != current:
+                raise PlanVersionConflict(
+                    f"{path} is at version {current}, expected {expected_version}"
+                )
+            # A coalesced edit keeps the expectation of the write it joins, but gets
+            # a version of its own so caches keyed on the version see the change
+            new_version = current + 1
+            base = pending[1] if pending else expected_version
+            self._pending[path] = (content, base, new_version)
+
+            timer = self._timers.pop(path, None)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce, self._flush_path, args=(path,))
+            timer.daemon = False
+            self._timers[path] = timer
+            timer.start()
+            return new_version
+
+    def _flush_path(self, path: str):
+        with self._lock:
+            pending = self._pending.pop(path, None)
+            self._timers.pop(path, None)
+        if pending is None:
+            return
+        content, expected_version, new_version = pending
+        try:
+            self.write(path, content, expected_version, new_version)
+        except Exception as e:
+            self.errors[path] = str(e)
+            print(f"Failed to save plan {path}: {str(e)}")
+
+    def flush(self, path=None):
+        """Write pending edits now, for one plan or all of them"""
+        with self._lock:
+            paths = [str(path)] if path is not None else list(self._pending)
+            for pending_path in paths:
+                timer = self._timers.pop(pending_path, None)
+                if timer is not None:
+                    timer.cancel()
+        for pending_path in paths:
+            self._flush_path(pending_path)
+
+class PlanRecordStore:
+    """Plans stored as structured JSON records keyed by project ID.
+
+    Records are written through a PlanFileStore, so they are atomic, locked and
+    versioned. Loading a plan is a json.loads; markdown is only rendered when a
+    plan is exported, and is cached per (project ID, version).
+    """
+
+    RECORD_FIELDS = ("overview", "work_packages", "source")
+
+    def __init__(self, plans_dir=None, file_store: Optional[PlanFileStore] = None,
+                 markdown_cache_size: int = 32):
+        self.plans_dir = Path(plans_dir or config.PATHS["plans"])
+        self.plans_dir.mkdir(parents=True, exist_ok=True)
+        self.file_store = file_store or get_plan_store()
+        self.markdown_cache_size = markdown_cache_size
+        self._markdown_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, project_id: str) -> Path:
+        return self.plans_dir / f"{project_id}.json"
+
+    def load(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Load a plan with its id, path and version, or None if it has no record"""
+        path = self.path(project_id)
+        if not path.exists():
+            return None
+        # Land any pending edit first so a reload sees it
+        self.file_store.flush(path)
+        content, version = self.file_store.read(path)
+        plan_data = json.loads(content)
+        plan_data.update({"id": project_id, "path": str(path), "version": version})
+        return plan_data
+
+    def save(self, project_id: str, plan_data: Dict[str, Any], expected_version: Optional[int] = None,
+             debounced: bool = False) -> int:
+        """Save a plan and return its new version; debounced saves coalesce rapid edits"""
+        record = {"id": project_id}
+        record.update({field: plan_data[field] for field in self.RECORD_FIELDS if field in plan_data})
+        content = json.dumps(record, indent=2)
+        write = self.file_store.write_debounced if debounced else self.file_store.write
+        return write(self.path(project_id), content, expected_version)
+
+    def markdown(self, plan_data: Dict[str, Any]) -> str:
+        """Markdown for a loaded plan, rendered once per version"""
+        from src.core.plan_markdown import render_plan_markdown
+
+        key = (plan_data.get("id"), plan_data.get("version"))
+        if None in key:
+            return render_plan_markdown(plan_data)
+        with self._lock:
+            if key in self._markdown_cache:
+                self._markdown_cache.move_to_end(key)
+                return self._markdown_cache[key]
+        md_content = render_plan_markdown(plan_data)
+        with self._lock:
+            self._markdown_cache[key] = md_content
+            while len(self._markdown_cache) > self.markdown_cache_size:
+                self._markdown_cache.popitem(last=False)
+        return md_content
+
+    def migrate_markdown(self, project_id: str, markdown_path) -> Dict[str, Any]:
+        """Parse a legacy markdown plan once and save it as this project's record"""
+        from src.core.plan_markdown import parse_plan_markdown
+
+        content, _ = self.file_store.read(markdown_path)
+        plan_data = parse_plan_markdown(content)
+        plan_data["source"] = str(markdown_path)
+        self.save(project_id, plan_data)
+        return self.load(project_id)
+
+_plan_store: Optional[PlanFileStore] = None
+_plan_store_lock = threading.Lock()
+
+def get_plan_store() -> PlanFileStore:
+    """Get the process-wide plan store, so debounced writes to a plan coalesce
+    across every session editing it
+    """
+    global _plan_store
+    if _plan_store is None:
+        with _plan_store_lock:
+            if _plan_store is None:
+                _plan_store = PlanFileStore()
+    return _plan_store
+
+_plan_records: Optional[PlanRecordStore] = None
+_plan_records_lock = threading.Lock()
+
+def get_plan_records() -> PlanRecordStore:
+    """Get the process-wide structured plan store"""
+    global _plan_records
+    if _plan_records is None:
+        with _plan_records_lock:
+            if _plan_records is None:
+                _plan_records = PlanRecordStore()
+    return _plan_records
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class SQLiteCache:
+    """Two-tier key/value cache: an in-memory LRU in front of a size-bounded SQLite table.
+    Entries are evicted least-recently-used first once either tier is full, and
+    optionally expire after a fixed time to live.
+    """
+
+    def __init__(self, db_path, max_entries: int = 100_000, memory_entries: int = 2048,
+                 ttl: Optional[float] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache(last_used)")
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key: str, value: bytes, created_at: float):
+        """Put an entry in the memory tier, evicting the least recently used one if full"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a cached value, or None if it is missing or expired"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Get all cached values for the given keys, omitting misses"""
+        now = time.time()
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            pending: List[str] = []
+            for key in dict.fromkeys(keys):
+                entry = self._memory.get(key)
+                if entry is not None and not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(pending), 500):
+                batch = pending[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM cache WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                touched = []
+                for key, value, created_at in rows:
+                    if self._expired(created_at, now):
+                        continue
+                    found[key] = value
+                    touched.append((now, key))
+                    self._remember(key, value, created_at)
+                if touched:
+                    self._conn.executemany("UPDATE cache SET last_used = ? WHERE key = ?", touched)
+                self.disk_hits += len(touched)
+                self.misses += len(batch) - len(touched)
+        return found
+
+    def set(self, key: str, value: bytes):
+        """Store a value in both tiers"""
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]):
+        """Store several values in one transaction"""
+        now = time.time()
+        rows = [(key, value, now, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            for key, value, created_at, _ in rows:
+                self._remember(key, value, created_at)
+
+            self._disk_count += len(rows)
+            if self._disk_count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Trim the disk tier to 90% of its capacity, oldest entries first"""
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,))
+            self._disk_count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        excess = self._disk_count - int(self.max_entries * 0.9)
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._disk_count -= excess
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM cache")
+            self._disk_count = 0
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count,
+            }
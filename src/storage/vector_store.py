@@ -1,12 +1,72 @@
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from src.config import config
+from src.core.plan_markdown import task_label, work_package_lines, wp_label
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+def content_hash(content, metadata=None):
+    """Stable hash of a document's content and metadata, used as its Chroma ID"""
+    metadata = {k: v for k, v in (metadata or {}).items() if k != "content_hash"}
+    payload = json.dumps({"content": content, "metadata": metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Prefixes of IDs that identify a chunk by its place in a plan or workspace
+STABLE_ID_PREFIXES = ("plan:", "code:")
+
+def is_stable_id(doc_id, metadata=None):
+    """Whether a document is kept under an ID of its own rather than its content hash:
+    plan and code chunks, and documents written with a content_hash under another ID
+    """
+    return doc_id.startswith(STABLE_ID_PREFIXES) or "content_hash" in (metadata or {})
+
+def plan_chunks(plan_data, path):
+    """Split a structured plan into overview, work package and task chunks.
+    Chunk IDs are derived from the plan path and WP/task numbering, so the same
+    section of a plan always maps to the same document.
+    """
+    base_metadata = {"type": "plan", "path": path}
+    chunks = []
+    
+    overview = plan_data.get("overview", "")
+    if overview:
+        chunks.append((f"plan:{path}#overview", overview, {**base_metadata, "chunk": "overview"}))
+    
+    for i, wp in enumerate(plan_data.get("work_packages", [])):
+        wp_id = wp_label(i)
+        wp_heading = f"{wp_id}: {wp['title']}"
+        task_chunks = []
+        
+        for j, task in enumerate(wp["tasks"]):
+            task_id = task_label(i, j)
+            task_chunks.append((
+                f"plan:{path}#{task_id}",
+                f"{task_id}: {task}\n\nWork package {wp_heading}",
+                {**base_metadata, "chunk": "task", "work_package": wp_id, "task": task_id},
+            ))
+        
+        chunks.append((
+            f"plan:{path}#{wp_id}",
+            "\n".join(work_package_lines(i, wp)),
+            {**base_metadata, "chunk": "work_package", "work_package": wp_id},
+        ))
+        chunks.extend(task_chunks)
+    
+    return chunks
 
 class ContextVectorStore:
     """Vector store implementation using Chroma"""
     
-    def __init__(self):
-        db_path = config.PATHS["vector_store"] / "chroma_db"
+    def __init__(self, persist_dir=None, max_workers=None):
+        persist_dir = Path(persist_dir or config.PATHS["vector_store"])
+        db_path = persist_dir / "chroma_db"
         
         # Create directory if it doesn't exist
         db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -15,19 +75,56 @@ class ContextVectorStore:
         self._vector_store = None
         self._document_class = None
         self._db_path = str(db_path)
+        self._embedding_cache_path = persist_dir / "embedding_cache.sqlite3"
+        
+        # Embedding and Chroma I/O block, so the async API runs them on a bounded
+        # pool instead of the caller's event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.INGEST["max_workers"],
+            thread_name_prefix="vector-store",
+        )
+        self._init_lock = threading.RLock()
+    
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the vector store's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
     
     @property
     def embeddings(self):
         """Lazy initialization of embeddings to avoid startup issues"""
-        if self._embeddings is None:
-            # Import inside function to avoid Streamlit watcher issues with torch
-            from langchain_huggingface import HuggingFaceEmbeddings
-            self._embeddings = HuggingFaceEmbeddings(
-                model_name="all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'}
-            )
+        with self._init_lock:
+            if self._embeddings is None:
+                self._embeddings = self._initialize_embeddings()
         return self._embeddings
     
+    def _initialize_embeddings(self):
+        """Load the embedding model behind the persistent embedding cache"""
+        # Import inside function to avoid Streamlit watcher issues with torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from src.storage.embedding_cache import CachedEmbeddings
+        from src.storage.sqlite_cache import SQLiteCache
+        
+        cache = SQLiteCache(
+            self._embedding_cache_path,
+            max_entries=config.CACHE["embedding_max_entries"],
+            memory_entries=config.CACHE["embedding_memory_entries"],
+        )
+        return CachedEmbeddings(
+            HuggingFaceEmbeddings(
+                model_name=EMBEDDING_MODEL,
+                model_kwargs={'device': 'cpu'}
+            ),
+            EMBEDDING_MODEL,
+            cache,
+        )
+    
+    def embedding_cache_stats(self):
+        """Embedding cache counters, or None if the embedding model hasn't been loaded"""
+        if self._embeddings is None:
+            return None
+        return self._embeddings.stats()
+    
     def _initialize_vector_store(self):
         """Separate initialization function to avoid early imports"""
         # Import inside function to avoid Streamlit watcher issues
@@ -47,8 +144,9 @@ class ContextVectorStore:
     @property
     def vector_store(self):
         """Lazy initialization of vector store to avoid startup issues"""
-        if self._vector_store is None:
-            self._vector_store = self._initialize_vector_store()
+        with self._init_lock:
+            if self._vector_store is None:
+                self._vector_store = self._initialize_vector_store()
         return self._vector_store
     
     @property
@@ -59,25 +157,266 @@ class ContextVectorStore:
             _ = self.vector_store
         return self._document_class
     
+    def has_document(self, doc_id):
+        """Check whether a document with the given ID is already indexed"""
+        return bool(self.vector_store.get(ids=[doc_id], include=[])["ids"])
+    
     async def add_context(self, content, metadata=None):
-        """Add content to the vector store"""
+        """Add content to the vector store, skipping content that is already indexed.
+        Returns the content-addressed ID of the document.
+        """
+        return await self._run(self._add_context, content, metadata)
+    
+    def _add_context(self, content, metadata=None):
         if metadata is None:
             metadata = {}
+        
+        # Identical content and metadata always map to the same ID, so reruns
+        # don't re-embed or append duplicate rows
+        doc_id = content_hash(content, metadata)
+        if self.has_document(doc_id):
+            return doc_id
             
         # Get vector store and Document class
         vector_store = self.vector_store
         Document = self.document_class
             
         # Create a Document object
-        document = Document(page_content=content, metadata=metadata)
+        document = Document(page_content=content, metadata={**metadata, "content_hash": doc_id})
         
         # Add documents to the vector store
-        vector_store.add_documents([document])
+        vector_store.add_documents([document], ids=[doc_id])
         # Persistence is automatic when persist_directory is provided
+        return doc_id
+        
+    async def index_plan(self, plan_data, path=None):
+        """Index a plan as one chunk per overview, work package and task.
+        Only chunks whose content changed since the last call are re-embedded,
+        and chunks that no longer exist in the plan are deleted, including those
+        indexed under the markdown file a migrated plan came from.
+        """
+        return await self._run(self._index_plan, plan_data, path)
+    
+    def _index_plan(self, plan_data, path=None):
+        path = path or plan_data.get("path")
+        if not path:
+            raise ValueError("Cannot index a plan without a path")
+        
+        vector_store = self.vector_store
+        existing = vector_store.get(where={"path": path}, include=["metadatas"])
+        existing_hashes = {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+        
+        ids, texts, metadatas = [], [], []
+        for doc_id, text, metadata in plan_chunks(plan_data, path):
+            digest = content_hash(text, metadata)
+            if existing_hashes.get(doc_id) != digest:
+                ids.append(doc_id)
+                texts.append(text)
+                metadatas.append({**metadata, "content_hash": digest})
+            existing_hashes.pop(doc_id, None)
         
+        # Chroma upserts by ID, so changed chunks replace their previous version
+        if ids:
+            vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+        
+        # Whatever is left belongs to removed sections or an older whole-plan document
+        stale = list(existing_hashes)
+        
+        # A plan migrated from markdown was indexed under its markdown path before
+        source = plan_data.get("source")
+        if source and source != path:
+            stale.extend(vector_store.get(where={"path": source}, include=[])["ids"])
+        if stale:
+            vector_store.delete(ids=stale)
+        
+        return {"updated": len(ids), "deleted": len(stale)}
+        
+    async def add_contexts_bulk(self, items, batch_size=None, write_batch_size=None, progress=None):
+        """Add many documents, embedding them in batches and writing to Chroma in large upserts.
+        Items are (content, metadata) or (content, metadata, doc_id) tuples and may come
+        from a generator. Documents whose content is already stored are skipped.
+        progress, if given, is called as progress(processed, stats) after every write,
+        from the vector store's worker thread.
+        """
+        return await self._run(self._add_contexts_bulk, items, batch_size, write_batch_size, progress)
+    
+    def _add_contexts_bulk(self, items, batch_size=None, write_batch_size=None, progress=None):
+        batch_size = batch_size or config.INGEST["embed_batch_size"]
+        write_batch_size = write_batch_size or config.INGEST["write_batch_size"]
+        stats = {"added": 0, "skipped": 0}
+        processed = 0
+        
+        pending = {}
+        for item in items:
+            content, metadata = item[0], item[1] or {}
+            digest = content_hash(content, metadata)
+            doc_id = item[2] if len(item) > 2 else digest
+            pending[doc_id] = (content, {**metadata, "content_hash": digest})
+            processed += 1
+            
+            if len(pending) >= write_batch_size:
+                self._write_batch(pending, batch_size, stats)
+                pending = {}
+                if progress:
+                    progress(processed, stats)
+        
+        if pending:
+            self._write_batch(pending, batch_size, stats)
+        if progress:
+            progress(processed, stats)
+        return stats
+    
+    def _write_batch(self, records, batch_size, stats):
+        """Embed and upsert the records whose stored content hash differs"""
+        collection = self.vector_store._collection
+        ids = list(records)
+        existing = collection.get(ids=ids, include=["metadatas"])
+        stored_hashes = {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+        
+        changed = [doc_id for doc_id in ids if stored_hashes.get(doc_id) != records[doc_id][1]["content_hash"]]
+        stats["skipped"] += len(ids) - len(changed)
+        if not changed:
+            return
+        
+        documents = [records[doc_id][0] for doc_id in changed]
+        embeddings = []
+        for start in range(0, len(documents), batch_size):
+            embeddings.extend(self.embeddings.embed_documents(documents[start:start + batch_size]))
+        
+        collection.upsert(
+            ids=changed,
+            documents=documents,
+            metadatas=[records[doc_id][1] for doc_id in changed],
+            embeddings=embeddings,
+        )
+        stats["added"] += len(changed)
+    
+    async def delete_documents(self, ids, batch_size=1000):
+        """Delete documents by ID; IDs that aren't stored are ignored"""
+        return await self._run(self._delete_documents, ids, batch_size)
+    
+    def _delete_documents(self, ids, batch_size=1000):
+        collection = self.vector_store._collection
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            collection.delete(ids=ids[start:start + batch_size])
+        return len(ids)
+    
     async def search_context(self, query, k=5):
         """Search the vector store for relevant content"""
+        return await self._run(self._search_context, query, k)
+    
+    def _search_context(self, query, k=5):
         # Initialize vector store only when needed
         vector_store = self.vector_store
         results = vector_store.similarity_search(query, k=k)
-        return results
\ No newline at end of file
+        return results
+    
+    def compact(self, batch_size=1000):
+        """Remove duplicate documents, keeping one content-addressed copy of each.
+        Rows stored before content addressing are re-keyed to their content hash,
+        reusing the stored embedding instead of recomputing it. Rows under stable
+        IDs (plan and code chunks, or anything added with an explicit ID) are left
+        alone, since incremental re-indexing finds and deletes them by ID.
+        """
+        collection = self.vector_store._collection
+        total = collection.count()
+        
+        # Group the content-addressed and legacy rows by the hash of their content and metadata
+        groups = {}
+        kept = 0
+        for offset in range(0, total, batch_size):
+            batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            for doc_id, content, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                digest = content_hash(content, metadata)
+                if doc_id != digest and is_stable_id(doc_id, metadata):
+                    kept += 1
+                    continue
+                groups.setdefault(digest, []).append(doc_id)
+        
+        removed = 0
+        rekeyed = 0
+        for target_id, ids in groups.items():
+            if target_id in ids:
+                stale = [doc_id for doc_id in ids if doc_id != target_id]
+            else:
+                # Copy one row under its content-addressed ID, then drop the originals
+                row = collection.get(ids=[ids[0]], include=["documents", "metadatas", "embeddings"])
+                metadata = dict(row["metadatas"][0] or {})
+                metadata["content_hash"] = target_id
+                collection.add(
+                    ids=[target_id],
+                    documents=row["documents"],
+                    metadatas=[metadata],
+                    embeddings=row["embeddings"],
+                )
+                rekeyed += 1
+                stale = ids
+            
+            for start in range(0, len(stale), batch_size):
+                collection.delete(ids=stale[start:start + batch_size])
+            removed += len(ids) - 1
+        
+        return {"scanned": total, "unique": len(groups), "removed": removed, "rekeyed": rekeyed, "stable": kept}
+
+def iter_plan_files(plans_dir):
+    """Yield (content, metadata, doc_id) chunks for every plan record in a directory,
+    and for legacy markdown plans that haven't been migrated to a record
+    """
+    from src.core.plan_markdown import parse_plan_markdown
+    
+    migrated = set()
+    for record_path in sorted(Path(plans_dir).glob("*.json")):
+        with open(record_path, "r") as f:
+            plan_data = json.load(f)
+        if plan_data.get("source"):
+            migrated.add(Path(plan_data["source"]).name)
+        for doc_id, text, metadata in plan_chunks(plan_data, str(record_path)):
+            yield text, metadata, doc_id
+    
+    for plan_path in sorted(Path(plans_dir).glob("*.md")):
+        if plan_path.name in migrated:
+            continue
+        with open(plan_path, "r") as f:
+            plan_data = parse_plan_markdown(f.read())
+        for doc_id, text, metadata in plan_chunks(plan_data, str(plan_path)):
+            yield text, metadata, doc_id
+
+def main():
+    """Command line maintenance for the context vector store"""
+    parser = argparse.ArgumentParser(description="Maintain the ContextMgr vector store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("compact", help="Remove duplicate documents from the store")
+    backfill = subparsers.add_parser("backfill", help="Index every plan in the plans directory")
+    backfill.add_argument("--plans-dir", default=str(config.PATHS["plans"]))
+    backfill.add_argument("--batch-size", type=int, default=config.INGEST["embed_batch_size"])
+    backfill.add_argument("--write-batch-size", type=int, default=config.INGEST["write_batch_size"])
+    args = parser.parse_args()
+    
+    store = ContextVectorStore()
+    if args.command == "backfill":
+        def report(processed, stats):
+            print(f"Processed {processed} chunks: {stats['added']} added, {stats['skipped']} unchanged")
+        
+        asyncio.run(store.add_contexts_bulk(
+            iter_plan_files(args.plans_dir),
+            batch_size=args.batch_size,
+            write_batch_size=args.write_batch_size,
+            progress=report,
+        ))
+    elif args.command == "compact":
+        stats = store.compact()
+        print(
+            f"Scanned {stats['scanned']} documents: kept {stats['unique']}, "
+            f"removed {stats['removed']} duplicates, re-keyed {stats['rekeyed']}, "
+            f"left {stats['stable']} stable-ID chunks as they were"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from src.config import config
+
+def git_dir(path: str) -> Optional[str]:
+    """The .git directory of a working tree, following "gitdir:" files of worktrees and submodules"""
+    dot_git = os.path.join(path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, "r") as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    if content.startswith("gitdir:"):
+        return os.path.normpath(os.path.join(path, content[len("gitdir:"):].strip()))
+    return None
+
+def read_branch(path: str) -> Optional[str]:
+    """The checked out branch read straight from HEAD, or a short SHA when detached"""
+    directory = git_dir(path)
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    return head[:7]
+
+class WorkspaceStatusCache:
+    """Whether each workspace has unstaged changes, computed off the request path.
+
+    get() never blocks: it returns the cached answer, or None ("unknown") and
+    schedules a check on a thread pool. Answers are keyed by the mtimes of the
+    repository's index and HEAD, so commits, checkouts and staging invalidate
+    them immediately. Edits to the working tree don't touch either file, so
+    answers older than `ttl` seconds are also re-checked in the background
+    while the old answer is still returned.
+    """
+
+    def __init__(self, max_workers: int = 4, ttl: float = 30.0):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workspace-status")
+        # path -> (key, modified, checked_at)
+        self._results: Dict[str, Tuple[Tuple[int, int], bool, float]] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path: str) -> Optional[Tuple[int, int]]:
+        directory = git_dir(path)
+        if directory is None:
+            return None
+        mtimes = []
+        for name in ("index", "HEAD"):
+            try:
+                mtimes.append(os.stat(os.path.join(directory, name)).st_mtime_ns)
+            except OSError:
+                mtimes.append(0)
+        return tuple(mtimes)
+
+    def get(self, path: str) -> Optional[bool]:
+        """True/False if the workspace has unstaged changes, None while unknown"""
+        key = self._key(path)
+        if key is None:
+            return None
+        with self._lock:
+            result = self._results.get(path)
+            fresh = result is not None and result[0] == key
+            if not fresh or time.monotonic() - result[2] > self.ttl:
+                if path not in self._pending:
+                    self._pending.add(path)
+                    self._executor.submit(self._check, path, key)
+            return result[1] if fresh else None
+
+    def _check(self, path: str, key: Tuple[int, int]):
+        try:
+            # Same question as len(repo.index.diff(None)) > 0, answered from git's stat cache
+            completed = subprocess.run(
+                ["git", "-C", path, "diff", "--quiet"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300
+            )
+            if completed.returncode in (0, 1):
+                with self._lock:
+                    self._results[path] = (key, completed.returncode == 1, time.monotonic())
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Could not get git status for {path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+
+_status_cache: Optional[WorkspaceStatusCache] = None
+_status_cache_lock = threading.Lock()
+
+def get_workspace_status() -> WorkspaceStatusCache:
+    """Get the process-wide workspace status cache"""
+    global _status_cache
+    if _status_cache is None:
+        with _status_cache_lock:
+            if _status_cache is None:
+                _status_cache = WorkspaceStatusCache(
+                    max_workers=config.WORKSPACE["status_workers"],
+                    ttl=config.WORKSPACE["status_ttl"],
+                )
+    return _status_cache
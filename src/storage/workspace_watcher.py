@@ -0,0 +1,247 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+from src.config import config
+from src.storage.file_index import SKIP_DIRS, WorkspaceFileIndex, get_file_index
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal ctypes binding for Linux inotify, watching directory trees"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory path relative to the root
+        self.watches: Dict[int, str] = {}
+
+    def add_tree(self, root: str, rel_dir: str = ""):
+        """Watch rel_dir and every directory below it"""
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(root, rel) if rel else root
+            wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(err, f"inotify_add_watch failed for {path}")
+            self.watches[wd] = rel
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.name not in SKIP_DIRS and entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(rel, entry.name) if rel else entry.name)
+            except OSError:
+                continue
+
+    def read(self, timeout: float):
+        """Yield (rel_dir, mask, name) for events arriving within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            yield self.watches.get(wd), mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+class WorkspaceWatcher:
+    """Keeps a workspace's file index current in the background.
+
+    On Linux, inotify events are collected until the workspace has been quiet
+    for `debounce` seconds, then the touched files are re-stat'ed into the
+    index (new, moved or deleted directories trigger an incremental refresh).
+    Elsewhere, or if inotify can't be used (e.g. the watch limit is reached),
+    it falls back to a full index refresh every `poll_interval` seconds.
+    Listeners receive each non-empty {"added", "modified", "removed"} batch.
+    """
+
+    def __init__(self, index: WorkspaceFileIndex, debounce: float = 0.5,
+                 poll_interval: float = 10.0, use_inotify: Optional[bool] = None):
+        self.index = index
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.mode: Optional[str] = None
+        self.batches = 0
+        self.last_error: Optional[str] = None
+        self._listeners: List[Callable[[Dict[str, List[str]]], None]] = []
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._refreshed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, callback: Callable[[Dict[str, List[str]]], None]):
+        self._listeners.append(callback)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the watcher's initial refresh; False if it timed out or failed"""
+        return self._ready.wait(timeout) and self._refreshed
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start watching in a background thread"""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"workspace-watcher:{os.path.basename(self.index.root)}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = Inotify()
+                inotify.add_tree(self.index.root)
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable for {self.index.root}, polling instead: {str(e)}")
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
+        try:
+            # Watches are in place before this refresh, so nothing is missed in between.
+            # It's a full one to catch files edited in place while nothing was watching.
+            changes = None
+            try:
+                changes = self.index.refresh(full=True)
+                self._refreshed = True
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Workspace watcher failed to refresh {self.index.root}: {str(e)}")
+            finally:
+                self._ready.set()
+            if changes is not None:
+                self._publish(changes)
+            if inotify is not None:
+                self.mode = "inotify"
+                self._watch(inotify)
+            else:
+                self.mode = "polling"
+                while not self._stop.wait(self.poll_interval):
+                    try:
+                        self._publish(self.index.refresh(full=True))
+                    except Exception as e:
+                        self.last_error = str(e)
+                        print(f"Workspace watcher failed to refresh {self.index.root}: {str(e)}")
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _watch(self, inotify: Inotify):
+        pending: Set[str] = set()
+        rescan = False
+        last_event = 0.0
+        while not self._stop.is_set():
+            timeout = max(0.0, last_event + self.debounce - time.monotonic()) if (pending or rescan) else 0.5
+            for rel_dir, mask, name in inotify.read(timeout):
+                last_event = time.monotonic()
+                if mask & IN_Q_OVERFLOW or rel_dir is None:
+                    rescan = True
+                    continue
+                if name in SKIP_DIRS:
+                    continue
+                rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            inotify.add_tree(self.index.root, rel_path)
+                        except OSError:
+                            pass
+                    rescan = True
+                elif name:
+                    pending.add(rel_path)
+
+            if (pending or rescan) and time.monotonic() - last_event >= self.debounce:
+                try:
+                    changes = self.index.update_paths(pending)
+                    if rescan:
+                        for kind, paths in self.index.refresh().items():
+                            changes[kind].extend(path for path in paths if path not in changes[kind])
+                    self._publish(changes)
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Workspace watcher failed to update {self.index.root}: {str(e)}")
+                pending = set()
+                rescan = False
+
+    def _publish(self, changes: Dict[str, List[str]]):
+        if not any(changes.values()):
+            return
+        self.batches += 1
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Workspace watcher listener failed: {str(e)}")
+
+_watchers: Dict[str, WorkspaceWatcher] = {}
+_watchers_lock = threading.Lock()
+
+def get_workspace_watcher(root: str) -> WorkspaceWatcher:
+    """Get the process-wide, running watcher for a workspace directory"""
+    root = os.path.abspath(root)
+    with _watchers_lock:
+        watcher = _watchers.get(root)
+        if watcher is None:
+            watcher = WorkspaceWatcher(
+                get_file_index(root),
+                debounce=config.WORKSPACE["watch_debounce"],
+                poll_interval=config.WORKSPACE["poll_interval"],
+            )
+            _watchers[root] = watcher
+        watcher.start()
+        return watcher
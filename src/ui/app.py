@@ -1,6 +1,6 @@
 import streamlit as st
-import asyncio
 import sys
+import time
 import os
 import json
 from pathlib import Path
@@ -13,26 +13,42 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 # Import config early to avoid import issues
 from src.config import config
+from src.core.async_runtime import get_background_loop
 
-# Lazy initialization for components
-_planner = None
-_vector_store = None
+# Lazy initialization for components. Streamlit re-executes this script for every
+# session and rerun, so heavy objects live in the process-wide resource cache and
+# are built once, under a lock, and shared by all sessions.
+@st.cache_resource(show_spinner=False)
+def get_model_router():
+    """Lazily initialize the model router shared by every session"""
+    from src.models.router import ModelRouter
+    return ModelRouter(warm_up=config.ROUTING["warm_up"])
 
+@st.cache_resource(show_spinner=False)
 def get_planner():
     """Lazily initialize the planner only when needed"""
-    global _planner
-    if _planner is None:
-        from src.core.planner import ProjectPlanner
-        _planner = ProjectPlanner()
-    return _planner
+    from src.core.planner import ProjectPlanner
+    return ProjectPlanner(get_model_router())
 
+@st.cache_resource(show_spinner=False)
 def get_vector_store():
     """Lazily initialize the vector store only when needed"""
-    global _vector_store
-    if _vector_store is None:
-        from src.storage.vector_store import ContextVectorStore
-        _vector_store = ContextVectorStore()
-    return _vector_store
+    from src.storage.vector_store import ContextVectorStore
+    return ContextVectorStore()
+
+@st.cache_resource(show_spinner=False)
+def get_history_store():
+    """Open the project history database shared by every session"""
+    from src.storage.history_store import ProjectHistoryStore
+    return ProjectHistoryStore()
+
+@st.cache_resource(show_spinner=False)
+def get_ollama_keepalive():
+    """Start warming and pinging the default Ollama model once per server process"""
+    from src.models.ollama_keepalive import OllamaKeepAlive
+    keepalive = OllamaKeepAlive.from_config()
+    keepalive.start()
+    return keepalive
 
 # Set up the Streamlit page
 st.set_page_config(
@@ -43,69 +59,50 @@ st.set_page_config(
 
 add_custom_css()
 
-# Initialize project history in session state if not exists
-if "project_history" not in st.session_state:
-    # Try to load from file if exists
-    history_file = config.PATHS["data"] / "project_history.json"
-    if history_file.exists():
-        try:
-            with open(history_file, "r") as f:
-                st.session_state.project_history = json.load(f)
-        except:
-            st.session_state.project_history = []
-    else:
-        st.session_state.project_history = []
+if config.OLLAMA["warm_up"]:
+    get_ollama_keepalive()
 
 if "current_project_id" not in st.session_state:
     st.session_state.current_project_id = None
 
-# Function to save project history
-def save_project_history():
-    history_file = config.PATHS["data"] / "project_history.json"
-    with open(history_file, "w") as f:
-        json.dump(st.session_state.project_history, f)
+if "history_page" not in st.session_state:
+    st.session_state.history_page = 0
+
+HISTORY_PAGE_SIZE = 20
 
 # Function to add project to history
-def add_project_to_history(project_name, plan_path, brief):
-    import uuid
-    project_id = str(uuid.uuid4())
-    project = {
-        "id": project_id,
-        "name": project_name,
-        "plan_path": plan_path,
-        "brief": brief,
-        "created_at": str(Path(plan_path).name).replace("plan-", "").replace(".md", "")
-    }
-    st.session_state.project_history.append(project)
+def add_project_to_history(project_name, plan_path, brief, project_id=None):
+    project_id = get_history_store().add(project_name, plan_path, brief, project_id=project_id)
     st.session_state.current_project_id = project_id
-    save_project_history()
+    st.session_state.history_page = 0
     return project_id
 
 # Function to load project data
 def load_project_data(project_id):
-    for project in st.session_state.project_history:
-        if project["id"] == project_id:
-            # Load plan data
-            plan_path = project["plan_path"]
-            try:
-                with open(plan_path, "r") as f:
-                    plan_content = f.read()
-                    
-                # Set session state for the loaded project
-                st.session_state.workflow_step = 4  # Go directly to work packages view
-                st.session_state.refined_brief = project["brief"]
-                
-                # Parse the plan content to recreate work_packages structure
-                planner = get_planner()
-                plan_data = planner.parse_markdown_plan(plan_content)
-                st.session_state.work_packages = plan_data
-                st.session_state.current_project_id = project_id
-                
-                return True
-            except Exception as e:
-                st.error(f"Failed to load project: {str(e)}")
-                return False
-    return False
+    history_store = get_history_store()
+    project = history_store.get(project_id)
+    if project is None:
+        return False
+
+    try:
+        from src.storage.plan_store import get_plan_records
+        plan_records = get_plan_records()
+        plan_data = plan_records.load(project_id)
+        if plan_data is None:
+            # Projects saved before structured plans: parse their markdown once
+            plan_data = plan_records.migrate_markdown(project_id, project["plan_path"])
+            history_store.set_plan_path(project_id, plan_data["path"])
+            
+        # Set session state for the loaded project
+        st.session_state.workflow_step = 4  # Go directly to work packages view
+        st.session_state.refined_brief = project["brief"]
+        st.session_state.work_packages = plan_data
+        st.session_state.current_project_id = project_id
+        
+        return True
+    except Exception as e:
+        st.error(f"Failed to load project: {str(e)}")
+        return False
 
 st.title("ContextMgr")
 
@@ -116,29 +113,46 @@ with st.sidebar:
     # Project history section (scrollable)
     st.subheader("Project History")
     
+    # Only one page of projects is read and rendered per rerun
+    history_store = get_history_store()
+    total_projects = history_store.count()
+    last_page = max(0, (total_projects - 1) // HISTORY_PAGE_SIZE)
+    st.session_state.history_page = min(st.session_state.history_page, last_page)
+    projects = history_store.recent(HISTORY_PAGE_SIZE, st.session_state.history_page * HISTORY_PAGE_SIZE)
+
     # Create a container for the scrolling list
     history_container = st.container()
     with history_container:
-        for project in st.session_state.project_history:
+        for project in projects:
             col1, col2 = st.columns([4, 1])
             with col1:
                 if st.button(f"{project['name']}", key=f"proj_{project['id']}"):
                     load_project_data(project['id'])
             with col2:
                 st.caption(project['created_at'][0:8])
+
+    if total_projects > HISTORY_PAGE_SIZE:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("Newer", key="history_newer", disabled=st.session_state.history_page == 0):
+                st.session_state.history_page -= 1
+                st.rerun()
+        with col2:
+            st.caption(f"Page {st.session_state.history_page + 1} of {last_page + 1} ({total_projects} projects)")
+        with col3:
+            if st.button("Older", key="history_older", disabled=st.session_state.history_page >= last_page):
+                st.session_state.history_page += 1
+                st.rerun()
     
     # Navigation panel at the bottom (sticky)
     st.markdown("---")
     st.subheader("Navigation")
     page = st.radio("Go to", ["Project Planning", "Context Search", "Settings"])
 
-# Function to safely run async functions in Streamlit
+# Function to safely run async functions in Streamlit. Everything runs on one
+# long-lived loop so model clients keep their HTTP connections between reruns.
 def run_async(async_func, *args, **kwargs):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(async_func(*args, **kwargs))
-    loop.close()
-    return result
+    return get_background_loop().run(async_func(*args, **kwargs))
 
 # Initialize session state for multi-step workflow
 if "workflow_step" not in st.session_state:
@@ -162,16 +176,40 @@ if "work_packages" not in st.session_state:
 if "loading_state" not in st.session_state:
     st.session_state.loading_state = False
 
+# Markdown is only rendered for export, and cached per plan version
+def get_plan_markdown(plan_data):
+    from src.storage.plan_store import get_plan_records
+    if not plan_data.get("id"):
+        return plan_data.get("plan", "")
+    return get_plan_records().markdown(plan_data)
+
 # Helper functions for workflow navigation
 def go_to_clarification():
     st.session_state.loading_state = True
     st.rerun()
 
-def process_clarification():
+# Render a streamed model response into a placeholder as it arrives
+def stream_to_placeholder(placeholder, stream, render):
+    text = ""
+    last_render = 0.0
+    for chunk in get_background_loop().iterate(stream):
+        text += chunk
+        # Throttle redraws; every redraw is a websocket message to the browser
+        now = time.monotonic()
+        if now - last_render > 0.05:
+            render(placeholder, text)
+            last_render = now
+    render(placeholder, text)
+    return text
+
+def process_clarification(placeholder):
     planner = get_planner()
-    questions = run_async(planner.generate_clarification_questions, 
-                         st.session_state.project_description)
-    st.session_state.clarification_questions = questions
+    response = stream_to_placeholder(
+        placeholder,
+        planner.stream_clarification_questions(st.session_state.project_description),
+        lambda target, text: target.code(text, language="json")
+    )
+    st.session_state.clarification_questions = planner.parse_clarification_questions(response)
     st.session_state.workflow_step = 2
     st.session_state.loading_state = False
     
@@ -179,11 +217,14 @@ def go_to_refined_brief():
     st.session_state.loading_state = True
     st.rerun()
 
-def process_refined_brief():
+def process_refined_brief(placeholder):
     planner = get_planner()
-    refined = run_async(planner.generate_refined_brief, 
-                       st.session_state.project_description,
-                       st.session_state.clarification_answers)
+    refined = stream_to_placeholder(
+        placeholder,
+        planner.stream_refined_brief(st.session_state.project_description,
+                                     st.session_state.clarification_answers),
+        lambda target, text: target.markdown(text)
+    )
     st.session_state.refined_brief = refined
     st.session_state.workflow_step = 3
     st.session_state.loading_state = False
@@ -192,10 +233,31 @@ def go_to_work_packages():
     st.session_state.loading_state = True
     st.rerun()
 
-def process_work_packages():
+def process_work_packages(placeholder):
     planner = get_planner()
-    plan_result = run_async(planner.generate_plan, 
-                           st.session_state.refined_brief)
+    
+    # Show the overview and each work package as soon as it is complete in the
+    # stream, with a running count of the output received so far
+    with placeholder.container():
+        progress_text = st.empty()
+        overview_area = st.empty()
+        packages_area = st.container()
+    
+    received = 0
+    plan_result = None
+    for kind, value in get_background_loop().iterate(planner.stream_plan(st.session_state.refined_brief)):
+        if kind == "token":
+            received += len(value)
+            progress_text.caption(f"Received {received:,} characters...")
+        elif kind == "overview":
+            overview_area.markdown(value)
+        elif kind == "work_package":
+            with packages_area:
+                st.markdown(f"**{value['title']}**")
+                st.markdown("\n".join(f"- {task}" for task in value["tasks"]))
+        elif kind == "plan":
+            plan_result = value
+    
     st.session_state.work_packages = plan_result
     st.session_state.workflow_step = 4
     st.session_state.loading_state = False
@@ -212,7 +274,8 @@ def process_work_packages():
     add_project_to_history(
         project_name,
         plan_result.get("path", ""),
-        st.session_state.refined_brief
+        st.session_state.refined_brief,
+        plan_result.get("id")
     )
     
 def reset_workflow():
@@ -225,15 +288,6 @@ def reset_workflow():
     st.session_state.loading_state = False
     st.session_state.current_project_id = None
 
-# Process any loading state actions
-if st.session_state.loading_state:
-    if st.session_state.workflow_step == 1:
-        process_clarification()
-    elif st.session_state.workflow_step == 2:
-        process_refined_brief()
-    elif st.session_state.workflow_step == 3:
-        process_work_packages()
-
 # Display workflow progress indicators
 if page == "Project Planning":
     # Create progress indicator
@@ -252,8 +306,8 @@ if page == "Project Planning":
     
     st.progress((current_step - 1) / (len(steps) - 1))
     
-    # If in loading state, show appropriate spinner and don't render the rest of the UI
-    should_continue = True
+    # If in loading state, stream the model output as it is generated; st.rerun()
+    # ends this run, so the rest of the UI only renders once the next step is ready
     if st.session_state.loading_state:
         spinner_text = {
             1: "Analyzing your request and preparing clarifying questions...",
@@ -261,134 +315,167 @@ if page == "Project Planning":
             3: "Generating detailed development plan..."
         }.get(current_step, "Processing...")
         
-        with st.spinner(spinner_text):
-            st.markdown(f"### {spinner_text}")
-            st.empty()  # Force the spinner to show
-            should_continue = False  # Skip the rest of the UI while loading
-    
-    # Only continue rendering the UI if not in loading state
-    if should_continue:
-        # Step 1: Initial brief input
-        if st.session_state.workflow_step == 1:
-            st.header("Describe Your Project")
-            
-            project_description = st.text_area(
-                "Project Description", 
-                height=200,
-                placeholder="Describe your project or development task in a few sentences..."
-            )
-            
-            if st.button("Next: Clarify Requirements"):
-                if project_description:
-                    st.session_state.project_description = project_description
-                    go_to_clarification()
+        st.markdown(f"### {spinner_text}")
+        output = st.empty()
+        if current_step == 1:
+            process_clarification(output)
+        elif current_step == 2:
+            process_refined_brief(output)
+        elif current_step == 3:
+            process_work_packages(output)
+        st.rerun()
+    
+    # Step 1: Initial brief input
+    if st.session_state.workflow_step == 1:
+        st.header("Describe Your Project")
         
-        # Step 2: Clarification questions
-        elif st.session_state.workflow_step == 2:
-            st.header("Let's Clarify Your Requirements")
-            
-            # Display all questions with their inputs
-            for i, question in enumerate(st.session_state.clarification_questions):
-                if question["type"] == "yes_no":
-                    answer = st.radio(
-                        question["question"],
-                        options=["Yes", "No"],
-                        key=f"q_{i}"
-                    )
-                    st.session_state.clarification_answers[question["id"]] = answer
-                    
-                elif question["type"] == "multiple_choice":
-                    answer = st.selectbox(
-                        question["question"],
-                        options=question["options"],
-                        key=f"q_{i}"
-                    )
-                    st.session_state.clarification_answers[question["id"]] = answer
-                    
-                elif question["type"] == "text":
-                    answer = st.text_input(
-                        question["question"],
-                        key=f"q_{i}"
-                    )
-                    st.session_state.clarification_answers[question["id"]] = answer
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Back to Project Description", type="secondary"):
-                    st.session_state.workflow_step = 1
-                    
-            with col2:
-                if st.button("Next: Review Brief"):
-                    go_to_refined_brief()
+        project_description = st.text_area(
+            "Project Description", 
+            height=200,
+            placeholder="Describe your project or development task in a few sentences..."
+        )
         
-        # Step 3: Refined brief
-        elif st.session_state.workflow_step == 3:
-            st.header("Review Your Project Brief")
-            
-            refined_brief = st.text_area(
-                "Edit your project brief as needed",
-                value=st.session_state.refined_brief,
-                height=300
-            )
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Back to Clarifications", type="secondary"):
-                    st.session_state.workflow_step = 2
-                    
-            with col2:
-                if st.button("Generate Development Plan"):
-                    st.session_state.refined_brief = refined_brief
-                    go_to_work_packages()
+        if st.button("Next: Clarify Requirements"):
+            if project_description:
+                st.session_state.project_description = project_description
+                go_to_clarification()
+    
+    # Step 2: Clarification questions
+    elif st.session_state.workflow_step == 2:
+        st.header("Let's Clarify Your Requirements")
         
-        # Step 4: Work packages and tasks with drag and drop
-        elif st.session_state.workflow_step == 4:
-            st.header("Development Plan")
-            
-            # Display work packages
-            if st.session_state.work_packages:
-                # Save to context
-                vector_store = get_vector_store()
-                if "path" in st.session_state.work_packages and st.session_state.work_packages["path"]:
-                    run_async(vector_store.add_context, 
-                        st.session_state.work_packages["plan"],
-                        {"type": "plan", "path": st.session_state.work_packages["path"]}
-                    )
+        # Display all questions with their inputs
+        for i, question in enumerate(st.session_state.clarification_questions):
+            if question["type"] == "yes_no":
+                answer = st.radio(
+                    question["question"],
+                    options=["Yes", "No"],
+                    key=f"q_{i}"
+                )
+                st.session_state.clarification_answers[question["id"]] = answer
+                
+            elif question["type"] == "multiple_choice":
+                answer = st.selectbox(
+                    question["question"],
+                    options=question["options"],
+                    key=f"q_{i}"
+                )
+                st.session_state.clarification_answers[question["id"]] = answer
                 
-                tabs = st.tabs(["Overview", "Work Packages"])
+            elif question["type"] == "text":
+                answer = st.text_input(
+                    question["question"],
+                    key=f"q_{i}"
+                )
+                st.session_state.clarification_answers[question["id"]] = answer
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Back to Project Description", type="secondary"):
+                st.session_state.workflow_step = 1
                 
-                with tabs[0]:
-                    st.markdown(st.session_state.work_packages["overview"])
+        with col2:
+            if st.button("Next: Review Brief"):
+                go_to_refined_brief()
+    
+    # Step 3: Refined brief
+    elif st.session_state.workflow_step == 3:
+        st.header("Review Your Project Brief")
+        
+        refined_brief = st.text_area(
+            "Edit your project brief as needed",
+            value=st.session_state.refined_brief,
+            height=300
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Back to Clarifications", type="secondary"):
+                st.session_state.workflow_step = 2
                 
-                # Inside your tabs[1] section (assuming work packages is the second tab)
-                with tabs[1]:
-                    display_work_packages()
-                    
-                    # Add export and new project buttons if needed
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.download_button(
-                            "Export Plan", 
-                            data=st.session_state.work_packages.get("plan", ""),
-                            file_name="development_plan.md",
-                            mime="text/markdown"
-                        ):
-                            pass
-                    
-                    with col2:
-                        # Adjust this to match your actual reset function name
-                        if st.button("Start New Project"):
-                            if "reset_workflow" in locals() or "reset_workflow" in globals():
-                                reset_workflow()
-                            else:
-                                st.warning("Reset function not found")
+        with col2:
+            if st.button("Generate Development Plan"):
+                st.session_state.refined_brief = refined_brief
+                go_to_work_packages()
+    
+    # Step 4: Work packages and tasks with drag and drop
+    elif st.session_state.workflow_step == 4:
+        st.header("Development Plan")
+        
+        # Display work packages
+        if st.session_state.work_packages:
+            if st.session_state.work_packages.get("recovered"):
+                st.warning("The generated plan was incomplete or malformed; showing the parts that could be recovered.")
+            
+            # Save to context, re-indexing only the plan sections that changed
+            if "path" in st.session_state.work_packages and st.session_state.work_packages["path"]:
+                indexed_key = (st.session_state.work_packages["path"], st.session_state.work_packages.get("version"))
+                if st.session_state.get("indexed_plan") != indexed_key:
+                    vector_store = get_vector_store()
+                    run_async(vector_store.index_plan, st.session_state.work_packages)
+                    st.session_state.indexed_plan = indexed_key
+            
+            tabs = st.tabs(["Overview", "Work Packages"])
             
-            # Option to go back and edit the brief
-            st.button("Back to Brief", type="secondary", on_click=lambda: setattr(st.session_state, 'workflow_step', 3))
+            with tabs[0]:
+                st.markdown(st.session_state.work_packages["overview"])
+            
+            # Inside your tabs[1] section (assuming work packages is the second tab)
+            with tabs[1]:
+                display_work_packages()
+                
+                # Add export and new project buttons if needed
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.download_button(
+                        "Export Plan", 
+                        data=get_plan_markdown(st.session_state.work_packages),
+                        file_name="development_plan.md",
+                        mime="text/markdown"
+                    ):
+                        pass
+                
+                with col2:
+                    # Adjust this to match your actual reset function name
+                    if st.button("Start New Project"):
+                        if "reset_workflow" in locals() or "reset_workflow" in globals():
+                            reset_workflow()
+                        else:
+                            st.warning("Reset function not found")
+        
+        # Option to go back and edit the brief
+        st.button("Back to Brief", type="secondary", on_click=lambda: setattr(st.session_state, 'workflow_step', 3))
 
 elif page == "Context Search":
     st.header("Search Development Context")
     
+    # Workspace code is chunked by function and class; re-indexing only touches changed files
+    with st.expander("Index Workspace Code"):
+        from src.storage.file_manager import CodebaseManager
+        if 'codebase_manager' not in st.session_state:
+            st.session_state.codebase_manager = CodebaseManager()
+        manager = st.session_state.codebase_manager
+        workspace_names = [w["name"] for w in manager.list_workspaces()]
+        if not workspace_names:
+            st.info("No workspaces available. Add one in the file explorer first.")
+        else:
+            workspace_name = st.selectbox("Workspace", workspace_names)
+            if st.button("Index for Context Search"):
+                if config.WORKSPACE["watch"]:
+                    # The watcher's index already reflects files edited in place
+                    manager.open_workspace(workspace_name, include_files=False)
+                else:
+                    # Incremental refreshes skip unchanged directories, so rescan for in-place edits
+                    manager.refresh_workspace(workspace_name, full=True)
+                ingestor = manager.code_ingestor(workspace_name, get_vector_store())
+                with st.spinner(f"Indexing {workspace_name}..."):
+                    stats = run_async(ingestor.ingest)
+                st.success(
+                    f"{stats['files']:,} files: {stats['ingested_files']:,} ingested, "
+                    f"{stats['unchanged_files']:,} unchanged, {stats['removed_files']:,} removed. "
+                    f"{stats['chunks_added']:,} chunks embedded, {stats['chunks_deleted']:,} deleted."
+                )
+    
     query = st.text_input("Search query")
     
     if query:
@@ -429,15 +516,70 @@ elif page == "Settings":
         index=0
     )
     
+    # Response cache for repeated identical requests (e.g. Back/Next in the workflow)
+    cache_stats = get_model_router().cache_stats()
+    if cache_stats:
+        st.caption("LLM response cache")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hits", cache_stats["hits"])
+        col2.metric("Misses", cache_stats["misses"])
+        col3.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+        col4.metric("Cached responses", cache_stats["disk_entries"])
+        if st.button("Clear Response Cache"):
+            get_model_router().response_cache.clear()
+            st.rerun()
+    
+    # Rate limiting, retries and circuit breakers per provider
+    provider_metrics = get_model_router().provider_metrics()
+    if provider_metrics:
+        st.caption("Provider health")
+        st.table([{"Provider": provider, **metrics} for provider, metrics in provider_metrics.items()])
+    
+    # Keep-alive pings for the default local model
+    if config.OLLAMA["warm_up"]:
+        keepalive_stats = get_ollama_keepalive().stats()
+        st.caption(f"Ollama keep-alive for {keepalive_stats['model']}")
+        if keepalive_stats["requests"]:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Cold load (s)", round(keepalive_stats["first_load"], 2))
+            col2.metric("Cold inference (s)", round(keepalive_stats["first_inference"], 2))
+            col3.metric("Last load (s)", round(keepalive_stats["last_load"], 2))
+            col4.metric("Last inference (s)", round(keepalive_stats["last_inference"], 2))
+        if keepalive_stats["last_error"]:
+            st.warning(f"Last warm-up failed: {keepalive_stats['last_error']}")
+    
+    # Streaming latency recorded by the shared model router
+    latency = get_model_router().latency_metrics()
+    if latency:
+        st.caption("Time to first token per model")
+        st.table([
+            {
+                "Model": name,
+                "Requests": stats["requests"],
+                "Avg first token (s)": round(stats["avg_ttft"], 2),
+                "Last first token (s)": round(stats["last_ttft"], 2),
+                "Avg total (s)": round(stats["avg_total"], 2),
+            }
+            for name, stats in latency.items()
+        ])
+    
     # Update to show Chroma DB location
     st.subheader("Storage Settings")
     st.text("Chroma database location: " + str(config.PATHS["vector_store"] / "chroma_db"))
     
+    embedding_stats = get_vector_store().embedding_cache_stats()
+    if embedding_stats:
+        st.caption("Embedding cache (each hit is one model inference saved)")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Hits", embedding_stats["hits"])
+        col2.metric("Misses", embedding_stats["misses"])
+        col3.metric("Hit rate", f"{embedding_stats['hit_rate']:.0%}")
+    
     # Management options
     st.subheader("Management")
     if st.button("Clear Project History"):
-        st.session_state.project_history = []
-        save_project_history()
+        get_history_store().clear()
+        st.session_state.history_page = 0
         st.success("Project history cleared")
         st.rerun()
 
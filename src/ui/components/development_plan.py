@@ -1,35 +1,44 @@
 import streamlit as st
+from src.core.plan_markdown import task_label, wp_label
+from src.storage.plan_store import PlanVersionConflict, get_plan_records
 
-def update_plan_markdown():
-    """Update the markdown plan based on current work packages"""
+def save_plan():
+    """Save the current work packages to the plan's record"""
     if not st.session_state.work_packages:
         return
     
-    md_content = "# Development Plan\n\n"
-    
-    # Add overview section
-    if "overview" in st.session_state.work_packages:
-        md_content += st.session_state.work_packages["overview"]
-    
-    md_content += "\n\n# Work Packages\n\n"
-    
-    # Add work packages
-    for i, wp in enumerate(st.session_state.work_packages["work_packages"]):
-        md_content += f"## WP{i+1:03d}: {wp['title']}\n\n"
-        for j, task in enumerate(wp["tasks"]):
-            md_content += f"- [ ] WP{i+1:03d}-{chr(65+j)}: {task}\n"
-        md_content += "\n"
-    
-    # Update the plan in session state
-    st.session_state.work_packages["plan"] = md_content
+    # Plans without a record (e.g. a failed generation) only live in the session
+    if not st.session_state.work_packages.get("id"):
+        return
     
-    # If we have a path, write to file
-    if "path" in st.session_state.work_packages and st.session_state.work_packages["path"]:
-        try:
-            with open(st.session_state.work_packages["path"], "w") as f:
-                f.write(md_content)
-        except Exception as e:
-            st.error(f"Failed to save plan to file: {e}")
+    # Schedule a write; rapid edits coalesce into one
+    try:
+        st.session_state.work_packages["version"] = get_plan_records().save(
+            st.session_state.work_packages["id"],
+            st.session_state.work_packages,
+            st.session_state.work_packages.get("version"),
+            debounced=True
+        )
+    except PlanVersionConflict:
+        st.error("This plan was changed in another session. Reload it from Project History to continue editing.")
+    except Exception as e:
+        st.error(f"Failed to save plan: {e}")
+
+WORK_PACKAGES_PER_PAGE = 10
+
+def _remove_task(wp, j):
+    """Remove a task and its done flag"""
+    wp["tasks"].pop(j)
+    if j < len(wp.get("done", [])):
+        wp["done"].pop(j)
+
+def _remove_work_package(i):
+    """Remove a work package and shift the expanded indexes after it"""
+    st.session_state.work_packages["work_packages"].pop(i)
+    st.session_state.expanded_wps = {
+        index - 1 if index > i else index
+        for index in st.session_state.expanded_wps if index != i
+    }
 
 def display_work_packages():
     if not st.session_state.work_packages:
@@ -41,106 +50,220 @@ def display_work_packages():
     if "editing_task" not in st.session_state:
         st.session_state.editing_task = None  # Format: (wp_index, task_index) or None
     
-    for i, wp in enumerate(st.session_state.work_packages["work_packages"]):
+    # Paging and expanded work packages belong to one plan; reset them for another
+    if st.session_state.get("plan_view_id") != st.session_state.work_packages.get("id"):
+        st.session_state.plan_view_id = st.session_state.work_packages.get("id")
+        st.session_state.wp_page = 0
+        st.session_state.expanded_wps = set()
+    
+    work_packages = st.session_state.work_packages["work_packages"]
+    last_page = max(0, (len(work_packages) - 1) // WORK_PACKAGES_PER_PAGE)
+    st.session_state.wp_page = min(st.session_state.get("wp_page", 0), last_page)
+    start = st.session_state.wp_page * WORK_PACKAGES_PER_PAGE
+    end = min(start + WORK_PACKAGES_PER_PAGE, len(work_packages))
+    
+    if st.toggle("Batch edit", key="batch_edit", help="Edit this page as tables and apply every change at once"):
+        display_batch_editor(start, end)
+    else:
+        # Only the current page is rendered, and only expanded work packages render their tasks
+        for i in range(start, end):
+            display_work_package(i, work_packages[i])
+        
+        # Add work package button
+        if st.button("+ Add Work Package"):
+            work_packages.append({
+                "title": "New Work Package",
+                "tasks": ["Task 1"]
+            })
+            st.session_state.expanded_wps.add(len(work_packages) - 1)
+            st.session_state.wp_page = (len(work_packages) - 1) // WORK_PACKAGES_PER_PAGE
+            save_plan()
+            st.rerun()
+    
+    if last_page > 0:
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col1:
+            if st.button("← Previous", key="wp_prev", disabled=st.session_state.wp_page == 0):
+                st.session_state.wp_page -= 1
+                st.rerun()
+        with col2:
+            st.caption(f"Work packages {start + 1}-{end} of {len(work_packages)}")
+        with col3:
+            if st.button("Next →", key="wp_next", disabled=st.session_state.wp_page >= last_page):
+                st.session_state.wp_page += 1
+                st.rerun()
+
+def display_work_package(i, wp):
+    """A work package header, with its tasks when it is expanded"""
+    expanded = i in st.session_state.expanded_wps
+    with st.container():
+        col1, col2, col3 = st.columns([0.05, 0.85, 0.1])
+        
+        # Expand/collapse toggle
+        with col1:
+            if st.button("▾" if expanded else "▸", key=f"toggle_wp_{i}"):
+                if expanded:
+                    st.session_state.expanded_wps.discard(i)
+                else:
+                    st.session_state.expanded_wps.add(i)
+                st.rerun()
+        
+        # Handle work package title editing
+        with col2:
+            if st.session_state.editing_wp == i:
+                new_title = st.text_input(
+                    f"Edit {wp_label(i)} Title",
+                    value=wp["title"],
+                    key=f"edit_wp_title_{i}"
+                )
+            else:
+                st.subheader(f"{wp_label(i)}: {wp['title']}")
+                if not expanded:
+                    st.caption(f"{len(wp['tasks'])} tasks")
+        
+        with col3:
+            if st.session_state.editing_wp == i:
+                if st.button("Save", key=f"save_wp_{i}"):
+                    wp["title"] = new_title
+                    st.session_state.editing_wp = None
+                    save_plan()
+                    st.rerun()
+                if st.button("Cancel", key=f"cancel_wp_{i}"):
+                    st.session_state.editing_wp = None
+                    st.rerun()
+            else:
+                col3_1, col3_2 = st.columns(2)
+                with col3_1:
+                    if st.button("✏️", key=f"edit_wp_{i}"):
+                        st.session_state.editing_wp = i
+                        st.rerun()
+                with col3_2:
+                    if st.button("🗑️", key=f"delete_wp_{i}"):
+                        if i < len(st.session_state.work_packages["work_packages"]):
+                            _remove_work_package(i)
+                            save_plan()
+                            st.rerun()
+        
+        if expanded:
+            display_tasks(i, wp)
+        
+        st.divider()
+
+def display_tasks(i, wp):
+    """Task rows and the add task button for an expanded work package"""
+    done = wp.get("done") or []
+    for j, task in enumerate(wp["tasks"]):
         with st.container():
-            col1, col2, col3 = st.columns([0.05, 0.85, 0.1])
+            task_col1, task_col2, task_col3 = st.columns([0.05, 0.85, 0.1])
             
-            # Handle work package title editing
-            with col1:
-                st.write("☰")  # Drag handle representation
+            with task_col1:
+                st.write("✅" if j < len(done) and done[j] else "⋮")
             
-            with col2:
-                if st.session_state.editing_wp == i:
-                    new_title = st.text_input(
-                        f"Edit WP{i+1:03d} Title",
-                        value=wp["title"],
-                        key=f"edit_wp_title_{i}"
+            with task_col2:
+                if st.session_state.editing_task == (i, j):
+                    new_task = st.text_input(
+                        f"Edit task {task_label(i, j)}",
+                        value=task,
+                        key=f"edit_task_{i}_{j}"
                     )
                 else:
-                    st.subheader(f"WP{i+1:03d}: {wp['title']}")
+                    st.write(f"{task_label(i, j)}: {task}")
             
-            with col3:
-                if st.session_state.editing_wp == i:
-                    if st.button("Save", key=f"save_wp_{i}"):
-                        st.session_state.work_packages["work_packages"][i]["title"] = new_title
-                        st.session_state.editing_wp = None
-                        update_plan_markdown()
+            with task_col3:
+                if st.session_state.editing_task == (i, j):
+                    if st.button("Save", key=f"save_task_{i}_{j}"):
+                        wp["tasks"][j] = new_task
+                        st.session_state.editing_task = None
+                        save_plan()
                         st.rerun()
-                    if st.button("Cancel", key=f"cancel_wp_{i}"):
-                        st.session_state.editing_wp = None
+                    if st.button("Cancel", key=f"cancel_task_{i}_{j}"):
+                        st.session_state.editing_task = None
                         st.rerun()
                 else:
-                    col3_1, col3_2 = st.columns(2)
-                    with col3_1:
-                        if st.button("✏️", key=f"edit_wp_{i}"):
-                            st.session_state.editing_wp = i
+                    task_col3_1, task_col3_2 = st.columns(2)
+                    with task_col3_1:
+                        if st.button("✏️", key=f"edit_task_{i}_{j}"):
+                            st.session_state.editing_task = (i, j)
                             st.rerun()
-                    with col3_2:
-                        if st.button("🗑️", key=f"delete_wp_{i}"):
-                            if i < len(st.session_state.work_packages["work_packages"]):
-                                st.session_state.work_packages["work_packages"].pop(i)
-                                # Update the markdown plan
-                                update_plan_markdown()
+                    with task_col3_2:
+                        if st.button("🗑️", key=f"delete_task_{i}_{j}"):
+                            if j < len(wp["tasks"]):
+                                _remove_task(wp, j)
+                                save_plan()
                                 st.rerun()
-            
-            # Display tasks for this work package
-            for j, task in enumerate(wp["tasks"]):
-                with st.container():
-                    task_col1, task_col2, task_col3 = st.columns([0.05, 0.85, 0.1])
-                    
-                    with task_col1:
-                        st.write("⋮")  # Task drag handle representation
-                    
-                    with task_col2:
-                        if st.session_state.editing_task == (i, j):
-                            new_task = st.text_input(
-                                f"Edit task WP{i+1:03d}-{chr(65+j)}",
-                                value=task,
-                                key=f"edit_task_{i}_{j}"
-                            )
-                        else:
-                            st.write(f"WP{i+1:03d}-{chr(65+j)}: {task}")
-                    
-                    with task_col3:
-                        if st.session_state.editing_task == (i, j):
-                            if st.button("Save", key=f"save_task_{i}_{j}"):
-                                st.session_state.work_packages["work_packages"][i]["tasks"][j] = new_task
-                                st.session_state.editing_task = None
-                                # Update the markdown plan
-                                update_plan_markdown()
-                                st.rerun()
-                            if st.button("Cancel", key=f"cancel_task_{i}_{j}"):
-                                st.session_state.editing_task = None
-                                st.rerun()
-                        else:
-                            task_col3_1, task_col3_2 = st.columns(2)
-                            with task_col3_1:
-                                if st.button("✏️", key=f"edit_task_{i}_{j}"):
-                                    st.session_state.editing_task = (i, j)
-                                    st.rerun()
-                            with task_col3_2:
-                                if st.button("🗑️", key=f"delete_task_{i}_{j}"):
-                                    if j < len(st.session_state.work_packages["work_packages"][i]["tasks"]):
-                                        st.session_state.work_packages["work_packages"][i]["tasks"].pop(j)
-                                        # Update the markdown plan
-                                        update_plan_markdown()
-                                        st.rerun()
-            
-            # Add task button
-            if st.button("+ Add Task", key=f"add_task_{i}"):
-                st.session_state.work_packages["work_packages"][i]["tasks"].append("New task")
-                # Update the markdown plan
-                update_plan_markdown()
-                st.rerun()
-            
-            st.divider()
     
-    # Add work package button
-    if st.button("+ Add Work Package"):
-        st.session_state.work_packages["work_packages"].append({
-            "title": "New Work Package",
-            "tasks": ["Task 1"]
-        })
-        # Update the markdown plan
-        update_plan_markdown()
-        st.rerun()
\ No newline at end of file
+    # Add task button
+    if st.button("+ Add Task", key=f"add_task_{i}"):
+        wp["tasks"].append("New task")
+        save_plan()
+        st.rerun()
+
+def display_batch_editor(start, end):
+    """Edit the current page as two tables inside a form. Nothing reruns while
+    editing; submitting applies every change and saves the plan once.
+    """
+    import pandas as pd
+    
+    work_packages = st.session_state.work_packages["work_packages"]
+    labels = [wp_label(i) for i in range(start, end)]
+    # Fresh editor widgets after every apply, so old edits aren't replayed on the new data
+    generation = st.session_state.setdefault("batch_edit_generation", 0)
+    
+    wp_rows = pd.DataFrame({
+        "ID": labels,
+        "Title": [work_packages[i]["title"] for i in range(start, end)],
+    })
+    task_rows = []
+    for i in range(start, end):
+        done = work_packages[i].get("done") or []
+        for j, task in enumerate(work_packages[i]["tasks"]):
+            task_rows.append({
+                "Work Package": wp_label(i),
+                "Task": task,
+                "Done": j < len(done) and bool(done[j]),
+            })
+    task_rows = pd.DataFrame(task_rows, columns=["Work Package", "Task", "Done"])
+    
+    with st.form(f"batch_edit_{start}"):
+        edited_wps = st.data_editor(
+            wp_rows,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["ID"],
+            key=f"batch_wps_{start}_{generation}"
+        )
+        edited_tasks = st.data_editor(
+            task_rows,
+            hide_index=True,
+            use_container_width=True,
+            num_rows="dynamic",
+            column_config={
+                "Work Package": st.column_config.SelectboxColumn(options=labels, required=True),
+                "Done": st.column_config.CheckboxColumn(default=False),
+            },
+            key=f"batch_tasks_{start}_{generation}"
+        )
+        submitted = st.form_submit_button("Apply changes")
+    
+    if submitted:
+        tasks_by_wp = {label: ([], []) for label in labels}
+        for row in edited_tasks.itertuples(index=False):
+            task = row[1]
+            if row[0] in tasks_by_wp and isinstance(task, str) and task.strip():
+                tasks_by_wp[row[0]][0].append(task)
+                tasks_by_wp[row[0]][1].append(bool(pd.notna(row[2]) and row[2]))
+        
+        for i, label, title in zip(range(start, end), labels, edited_wps["Title"]):
+            tasks, done = tasks_by_wp[label]
+            # A cleared title cell comes back as None/NaN; keep the old title then
+            if isinstance(title, str) and title.strip():
+                work_packages[i]["title"] = title
+            work_packages[i]["tasks"] = tasks
+            if any(done):
+                work_packages[i]["done"] = done
+            else:
+                work_packages[i].pop("done", None)
+        
+        st.session_state.batch_edit_generation += 1
+        save_plan()
+        st.rerun()
@@ -1,7 +1,10 @@
 import streamlit as st
 import os
+from src.config import config
 from src.storage.file_manager import CodebaseManager
 
+FILES_PER_PAGE = 100
+
 def render_file_explorer():
     """Render the file explorer component in Streamlit"""
     # Initialize the codebase manager
@@ -50,23 +53,59 @@ def render_file_explorer():
     
     # Select workspace
     workspace_names = [w["name"] for w in workspaces]
-    selected_workspace = st.sidebar.selectbox("Select Workspace", workspace_names)
+    labels = {
+        w["name"]: f"{w['name']} ({w['active_branch']}{', modified' if w['modified'] else ''})"
+        for w in workspaces
+    }
+    selected_workspace = st.sidebar.selectbox(
+        "Select Workspace", workspace_names, format_func=lambda name: labels.get(name, name)
+    )
     
     if not selected_workspace:
         return
     
     # Display workspace contents
-    workspace = manager.open_workspace(selected_workspace)
+    workspace = manager.open_workspace(selected_workspace, include_files=False)
     
     # Display files in a table
     st.header(f"Files in {selected_workspace}")
     
-    # Simple filtering
-    filter_text = st.text_input("Filter files", "")
+    if config.WORKSPACE["watch"]:
+        watcher = manager.watch_workspace(selected_workspace)
+        st.caption(f"Watching for changes ({watcher.mode or 'starting'})")
+    
+    # Refreshes are incremental; a rescan also catches files edited in place
+    if st.button("Rescan Files"):
+        changes = manager.refresh_workspace(selected_workspace, full=True)
+        st.caption(
+            f"{len(changes['added'])} added, {len(changes['modified'])} modified, "
+            f"{len(changes['removed'])} removed"
+        )
+    
+    # Ranked substring and fuzzy filtering; only the current page becomes table rows
+    filter_text = st.text_input("Filter files", "", placeholder="Type part of a path, e.g. fmgr")
+    if st.session_state.get("file_filter") != (selected_workspace, filter_text):
+        st.session_state.file_filter = (selected_workspace, filter_text)
+        st.session_state.file_page = 0
+    
+    total, files = manager.search_files(
+        selected_workspace, filter_text, FILES_PER_PAGE, st.session_state.file_page * FILES_PER_PAGE
+    )
     
-    files = workspace["files"]
-    if filter_text:
-        files = [f for f in files if filter_text.lower() in f["path"].lower()]
+    if total > FILES_PER_PAGE:
+        last_page = (total - 1) // FILES_PER_PAGE
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col1:
+            if st.button("← Previous", key="file_prev", disabled=st.session_state.file_page == 0):
+                st.session_state.file_page -= 1
+                st.rerun()
+        with col2:
+            first = st.session_state.file_page * FILES_PER_PAGE
+            st.caption(f"{first + 1}-{first + len(files)} of {total:,} files")
+        with col3:
+            if st.button("Next →", key="file_next", disabled=st.session_state.file_page >= last_page):
+                st.session_state.file_page += 1
+                st.rerun()
     
     # Display as a table with clickable links
     if files:
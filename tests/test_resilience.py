@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from src.models.resilience import CircuitBreaker, CircuitOpenError, ProviderGuard
+
+def open_then_half_open(guard: ProviderGuard):
+    """Trip the guard's breaker and let its reset timeout pass"""
+    for _ in range(guard.breaker.failure_threshold):
+        guard.breaker.record_failure()
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    guard.breaker.opened_at = time.monotonic() - guard.breaker.reset_timeout
+
+async def hold_slot(guard: ProviderGuard, release: asyncio.Event):
+    """Occupy the guard's only concurrency slot until release is set"""
+    async with guard._semaphores.get():
+        await release.wait()
+
+def test_half_open_trial_cancelled_waiting_for_slot_is_released():
+    async def scenario():
+        guard = ProviderGuard("test", max_concurrency=1, max_retries=0, failure_threshold=1, reset_timeout=60)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(guard, release))
+        await asyncio.sleep(0)
+
+        open_then_half_open(guard)
+        trial = asyncio.create_task(guard.call(lambda: asyncio.sleep(0, result="trial")))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+
+        # Hedging cancels the losing request while it is still queued
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        release.set()
+        await holder
+
+        # The next call is let through as the new trial and closes the circuit
+        assert await guard.call(lambda: asyncio.sleep(0, result="ok")) == "ok"
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+def test_half_open_stream_cancelled_waiting_for_token_is_released():
+    async def numbers():
+        for i in range(3):
+            yield i
+
+    async def consume(guard):
+        return [item async for item in guard.stream(numbers)]
+
+    async def scenario():
+        guard = ProviderGuard("test", rate=0.5, max_retries=0, failure_threshold=1, reset_timeout=60)
+        guard.bucket._tokens = 0
+        open_then_half_open(guard)
+
+        trial = asyncio.create_task(consume(guard))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        guard.bucket._tokens = guard.bucket.capacity
+        assert await consume(guard) == [0, 1, 2]
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+def test_only_one_half_open_trial_at_a_time():
+    async def scenario():
+        guard = ProviderGuard("test", max_concurrency=2, max_retries=0, failure_threshold=1, reset_timeout=60)
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def slow_trial():
+            started.set()
+            await finish.wait()
+            return "trial"
+
+        open_then_half_open(guard)
+        trial = asyncio.create_task(guard.call(slow_trial))
+        await started.wait()
+
+        # Only one trial at a time: others are short-circuited while it runs
+        with pytest.raises(CircuitOpenError):
+            await guard.call(lambda: asyncio.sleep(0))
+        finish.set()
+        assert await trial == "trial"
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())